@@ -1,13 +1,27 @@
-import csv
+import argparse
+import os
 import re
-import time
+import shutil
+from contextlib import nullcontext
+from pathlib import Path
 from urllib.parse import urljoin
 
 import requests
 from bs4 import BeautifulSoup
 
+import fast_parser
+from crawl import CrawlJournal, index_urls, parse_volumes, parse_years
+from fetcher import HostRateLimiter, fetch_all, make_session
+from harvest_index import HarvestIndex, docid_from_url, result_hash
+from http_cache import CacheMiss, HttpCache
+from parse_pool import parse_in_pool
+from section_store import SectionStore
+from sinks import BATCH_SIZE, FORMATS, compact, open_sink
 
-INDEX_URL = "https://search.bger.ch/ext/eurospider/live/de/php/clir/http/index_atf.php?year=151&volume=III&lang=de&zoom=&system=clir"
+
+# Standard: ein Band (BGE 151 III); für den ganzen Korpus z.B. --years 80-151 --volumes all
+YEARS = "151"
+VOLUMES = "III"
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 "
@@ -15,13 +29,41 @@ HEADERS = {
     "Accept-Language": "de-CH,de;q=0.9,en;q=0.6",
 }
 
-
-def fetch_html(session: requests.Session, url: str) -> str:
-    r = session.get(url, headers=HEADERS, timeout=30, allow_redirects=True)
+# höflich: im Mittel höchstens 2 Anfragen pro Sekunde und Host (früher 0.5 s Pause)
+REQUESTS_PER_SECOND = 2.0
+CONCURRENCY = 4
+CACHE_FILE = "http_cache.sqlite"
+PARSE_WORKERS = os.cpu_count() or 1
+# Seiten, die zwischen Download und Parser gepuffert werden dürfen
+PARSE_QUEUE_SIZE = 64
+
+# docid (z.B. "atf://151-III-1:de") identifiziert einen Entscheid über Läufe hinweg
+FIELDS = ["docid", "urteilsnummer", "regeste"]
+
+
+def fetch_html(
+    session: requests.Session,
+    url: str,
+    cache: HttpCache | None = None,
+    offline: bool = False,
+) -> str:
+    cached = cache.get(url) if cache is not None else None
+    if offline:
+        if cached is None:
+            raise CacheMiss(f"Nicht im Cache (Offline-Modus): {url}")
+        return cached.text
+
+    headers = HEADERS if cached is None else {**HEADERS, **cached.conditional_headers()}
+    r = session.get(url, headers=headers, timeout=30, allow_redirects=True)
+    if cached is not None and r.status_code == 304:
+        cache.touch(url)
+        return cached.text
     r.raise_for_status()
     # robustes Encoding
     if not r.encoding:
         r.encoding = r.apparent_encoding or "utf-8"
+    if cache is not None:
+        cache.put(url, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
     return r.text
 
 
@@ -121,43 +163,260 @@ def parse_urteilsnummer(soup: BeautifulSoup) -> str:
     return f"{m.group(1)} {m.group(2)} {m.group(3)}"
 
 
-def main():
-    out_csv = "bge_151_iii_regesten.csv"
-
-    with requests.Session() as session:
-        index_html = fetch_html(session, INDEX_URL)
-        decision_links = extract_decision_links(index_html, INDEX_URL)
+def parse_page(html: str) -> dict[str, str]:
+    """HTML eines Entscheids → {"urteilsnummer", "regeste"}, Referenz-Implementierung mit BeautifulSoup."""
+    soup = BeautifulSoup(html, "lxml")
+    return {"urteilsnummer": parse_urteilsnummer(soup), "regeste": parse_regeste(soup)}
 
-        if not decision_links:
-            raise RuntimeError(
-                "Keine Entscheid-Links im Index gefunden. Dann müssen wir die Link-Erkennung anpassen."
-            )
 
-        rows = []
-        for i, url in enumerate(decision_links, start=1):
-            time.sleep(0.5)  # höflich: nicht zu schnell
-            html = fetch_html(session, url)
-            soup = BeautifulSoup(html, "lxml")
+PARSERS = {
+    "lxml": fast_parser.parse_page,
+    "bs4": parse_page,
+}
 
-            urteilsnummer = parse_urteilsnummer(soup)
-            regeste = parse_regeste(soup)
 
-            if not urteilsnummer:
-                print(f"[WARN] Urteilsnummer nicht gefunden: {url}")
-            if not regeste:
-                print(f"[WARN] Regeste nicht gefunden: {url}")
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BGE-Regesten von search.bger.ch extrahieren")
+    parser.add_argument(
+        "--years", default=YEARS,
+        help=f"Jahrgänge, z.B. 151 oder 140-151 oder 140,145-151 (Standard: {YEARS})",
+    )
+    parser.add_argument(
+        "--volumes", default=VOLUMES,
+        help=f"Bände, z.B. III oder I,II oder all (Standard: {VOLUMES})",
+    )
+    parser.add_argument(
+        "--format", choices=FORMATS, default="csv",
+        help="Ausgabeformat (Standard: csv; parquet braucht pyarrow)",
+    )
+    parser.add_argument("--out", help="Ausgabedatei (Standard: aus Jahrgängen/Bänden abgeleitet)")
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help=f"Zeilen pro geschriebenem Batch bzw. Parquet-Row-Group (Standard: {BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--parser", choices=sorted(PARSERS), default="lxml",
+        help="Parser-Backend: lxml (schnell, XPath) oder bs4 (BeautifulSoup-Referenz)",
+    )
+    parser.add_argument(
+        "--sections", metavar="DIR",
+        help="Volltext in Abschnitte (Kopf, Sachverhalt, Erwägungen) zerlegen und komprimiert in DIR speichern",
+    )
+    parser.add_argument(
+        "--parse-workers", type=int, default=PARSE_WORKERS,
+        help=f"Parser-Prozesse (Standard: {PARSE_WORKERS}, 0 = im Hauptprozess parsen)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=CONCURRENCY,
+        help=f"Anzahl paralleler Downloads (Standard: {CONCURRENCY}, 1 = seriell)",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=REQUESTS_PER_SECOND,
+        help=f"Maximale Anfragen pro Sekunde und Host (Standard: {REQUESTS_PER_SECOND})",
+    )
+    parser.add_argument(
+        "--cache", default=CACHE_FILE,
+        help=f"SQLite-Datei für den HTTP-Cache (Standard: {CACHE_FILE})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="HTTP-Cache nicht verwenden")
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Nur aus dem Cache lesen (kein Netzwerk), z.B. nach Änderungen am Parser; "
+             "parst alle Entscheide neu (das Journal wird ignoriert) und schreibt nur "
+             "Entscheide mit geändertem Ergebnis",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Checkpoint-Journal zum Fortsetzen abgebrochener Läufe (Standard: <out>.journal.jsonl)",
+    )
+    parser.add_argument(
+        "--harvest-index",
+        help="Index bereits geschriebener Entscheide (Standard: <out>.harvest.sqlite)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Index-Seiten neu laden und nur Entscheide verarbeiten, die noch nicht im Harvest-Index sind",
+    )
+    parser.add_argument(
+        "--revalidate", action="store_true",
+        help="Mit --incremental: auch bekannte Entscheide prüfen und geänderte neu schreiben",
+    )
+    parser.add_argument(
+        "--restart", action="store_true",
+        help="Vorhandenes Journal, Harvest-Index und Ausgabe verwerfen und von vorne beginnen",
+    )
+    args = parser.parse_args()
+    if args.offline and args.no_cache:
+        parser.error("--offline braucht den Cache")
+    if args.revalidate and not args.incremental:
+        parser.error("--revalidate geht nur zusammen mit --incremental")
+    if args.sections and args.parser != "lxml":
+        parser.error("--sections gibt es nur mit dem lxml-Parser")
+    try:
+        args.years = parse_years(args.years)
+        args.volumes = parse_volumes(args.volumes)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.out is None:
+        args.out = default_out_path(args.years, args.volumes, args.format)
+    if args.journal is None:
+        # ein Journal pro Ausgabe: es hält fest, was dort bereits geschrieben ist
+        args.journal = f"{args.out}.journal.jsonl"
+    if args.harvest_index is None:
+        args.harvest_index = f"{args.out}.harvest.sqlite"
+    return args
+
+
+def default_out_path(years: list[int], volumes: list[str], fmt: str) -> str:
+    year_part = str(years[0]) if len(years) == 1 else f"{min(years)}-{max(years)}"
+    volume_part = volumes[0].lower() if len(volumes) == 1 else "_".join(v.lower() for v in volumes)
+    return f"bge_{year_part}_{volume_part}_regesten.{fmt}"
+
+
+def remove_output(path: str) -> None:
+    out = Path(path)
+    if out.is_dir():
+        shutil.rmtree(out)
+    else:
+        out.unlink(missing_ok=True)
+
+
+def compact_output(args: argparse.Namespace) -> None:
+    """Ersetzte Entscheide aus der Ausgabe entfernen, falls der Harvest-Index das verlangt."""
+    with HarvestIndex(args.harvest_index) as harvested:
+        if not harvested.needs_compaction:
+            return
+        removed = compact(args.format, args.out, key="docid")
+        harvested.mark_compacted()
+    print(f"{removed} ersetzte Zeilen aus {args.out} entfernt")
 
-            rows.append((urteilsnummer, regeste))
-            print(f"[{i}/{len(decision_links)}] {urteilsnummer} extrahiert")
 
-    # CSV schreiben (DE/CH-Excel: Semikolon ist meist angenehm)
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter=";")
-        writer.writerow(["urteilsnummer", "regeste"])
-        writer.writerows(rows)
+def main():
+    args = parse_args()
+    parse = fast_parser.parse_decision if args.sections else PARSERS[args.parser]
+    # Offline wird nur von der Platte gelesen: keine Drosselung nötig
+    limiter = None if args.offline else HostRateLimiter(args.rate)
+    cache_ctx = nullcontext() if args.no_cache else HttpCache(args.cache)
+    if args.restart:
+        Path(args.journal).unlink(missing_ok=True)
+        Path(args.harvest_index).unlink(missing_ok=True)
+        remove_output(args.out)
+        if args.sections:
+            remove_output(args.sections)
+    store_ctx = SectionStore(args.sections) if args.sections else nullcontext()
+    # ein früherer Lauf kann vor dem Kompaktieren abgebrochen sein
+    compact_output(args)
+
+    with (
+        make_session(args.concurrency) as session,
+        cache_ctx as cache,
+        CrawlJournal(args.journal) as journal,
+        HarvestIndex(args.harvest_index) as harvested,
+        open_sink(args.format, args.out, FIELDS, args.batch_size) as sink,
+        store_ctx as store,
+    ):
+        def fetch(url: str) -> str:
+            return fetch_html(session, url, cache=cache, offline=args.offline)
+
+        def fetch_pages(urls: list[str]):
+            return fetch_all(urls, fetch, concurrency=args.concurrency, limiter=limiter)
+
+        # 1. Frontier aus den Index-Seiten aufbauen (bereits bekannte aus dem Journal;
+        #    inkrementell werden alle neu geladen, um neue Entscheide zu finden)
+        all_index_pages = index_urls(args.years, args.volumes)
+        if args.incremental:
+            open_index_pages = all_index_pages
+        else:
+            open_index_pages = [u for u in all_index_pages if u not in journal.index_links]
+        for url, html in fetch_pages(open_index_pages):
+            if isinstance(html, Exception):
+                print(f"[WARN] Index nicht abrufbar: {url} ({html})")
+                continue
+            links = extract_decision_links(html, url)
+            if not links:
+                print(f"[WARN] Keine Entscheid-Links im Index: {url}")
+            journal.record_index(url, links)
+
+        decision_links = journal.frontier(all_index_pages)
+        if not decision_links:
+            raise RuntimeError(
+                "Keine Entscheid-Links im Index gefunden. Dann müssen wir die Link-Erkennung anpassen."
+            )
 
-    print(f"Fertig: {out_csv}")
+        # 2. Offene Entscheide abarbeiten
+        if args.incremental:
+            # neu = noch nicht im Harvest-Index; mit --revalidate alle (Conditional GET, meist 304)
+            pending = [
+                u for u in decision_links
+                if args.revalidate or docid_from_url(u) not in harvested
+            ]
+        elif args.offline:
+            # Neu-Parsen aus dem Cache (z.B. nach Parser-Änderungen): alle Entscheide,
+            # unveränderte Ergebnisse überspringt der Harvest-Index
+            pending = decision_links
+        else:
+            pending = [u for u in decision_links if u not in journal.done]
+        n_done = len(decision_links) - len(pending)
+        print(
+            f"{len(all_index_pages)} Index-Seiten, {len(decision_links)} Entscheide, "
+            f"davon {n_done} bereits erledigt"
+        )
+
+        # Erst wenn der Sink die Zeilen dauerhaft geschrieben hat, gelten sie
+        # im Journal und im Harvest-Index als erledigt
+        written: list[tuple[str, str, str]] = []
+        n_unchanged = 0
+
+        def checkpoint() -> None:
+            sink.checkpoint()
+            if store is not None:
+                store.checkpoint()
+            journal.record_done([url for _, url, _ in written])
+            harvested.record(written)
+            written.clear()
+
+        results = parse_in_pool(
+            fetch_pages(pending),
+            parse,
+            workers=args.parse_workers,
+            queue_size=PARSE_QUEUE_SIZE,
+        )
+        try:
+            for i, (url, result) in enumerate(results, start=n_done + 1):
+                if isinstance(result, Exception):
+                    print(f"[WARN] Verarbeitung fehlgeschlagen: {url} ({result})")
+                    continue
+                urteilsnummer, regeste = result["urteilsnummer"], result["regeste"]
+
+                if not urteilsnummer:
+                    print(f"[WARN] Urteilsnummer nicht gefunden: {url}")
+                if not regeste:
+                    print(f"[WARN] Regeste nicht gefunden: {url}")
+
+                docid = docid_from_url(url)
+                row = {"docid": docid, **{f: result[f] for f in FIELDS if f != "docid"}}
+                # nur geschriebene Spalten: --sections an/aus ändert den Hash nicht
+                h = result_hash(row)
+                if harvested.get(docid) == h:
+                    n_unchanged += 1
+                    print(f"[{i}/{len(decision_links)}] {urteilsnummer} unverändert")
+                    continue
+
+                sink.write(row)
+                if store is not None:
+                    store.put(docid, {k: v for k, v in result.items() if k != "urteilsnummer"})
+                written.append((docid, url, h))
+                if len(written) >= sink.checkpoint_rows:
+                    checkpoint()
+                print(f"[{i}/{len(decision_links)}] {urteilsnummer} extrahiert")
+        finally:
+            checkpoint()
+
+    compact_output(args)
+    if n_unchanged:
+        print(f"{n_unchanged} Entscheide unverändert, nicht neu geschrieben")
+    print(f"Fertig: {args.out}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
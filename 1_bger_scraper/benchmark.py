@@ -0,0 +1,231 @@
+"""Benchmark-Suite für die Parser-Funktionen des Scrapers.
+
+Läuft komplett offline, entweder auf den Seiten in `fixtures/` oder auf
+allen Seiten im HTTP-Cache eines früheren Laufs:
+
+    uv run python benchmark.py                          # fixtures/*.html
+    uv run python benchmark.py --cache http_cache.sqlite
+    uv run python benchmark.py --save-baseline          # Referenzwerte speichern
+
+Pro Funktion werden Durchsatz (Aufrufe/s, bester von `--repeat`
+Durchläufen) und Spitzen-Speicher (tracemalloc, eigener Durchlauf)
+gemessen. Gibt es eine Baseline-Datei, schlägt der Lauf fehl, sobald eine
+Funktion um mehr als `--threshold` langsamer wird oder mehr Speicher
+braucht. Vorher wird geprüft, dass alle Parser-Backends dieselben
+Ergebnisse liefern wie die BeautifulSoup-Referenz.
+"""
+
+import argparse
+import importlib.util
+import json
+import sqlite3
+import sys
+import time
+import tracemalloc
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+import fast_parser
+
+
+BASE_DIR = Path(__file__).parent
+FIXTURES_DIR = BASE_DIR / "fixtures"
+BASELINE_FILE = BASE_DIR / "benchmark_baseline.json"
+# erlaubte Verschlechterung gegenüber der Baseline (0.3 = 30 %)
+THRESHOLD = 0.3
+DEFAULT_BASE_URL = "https://search.bger.ch/ext/eurospider/live/de/php/clir/http/index_atf.php"
+
+
+def load_scraper():
+    """Hauptskript als Modul laden (der Dateiname ist kein gültiger Modulname)."""
+    spec = importlib.util.spec_from_file_location("bger_scraper", BASE_DIR / "1_bger_scraper.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_fixture_pages(fixtures_dir: Path) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """(Index-Seiten, Entscheid-Seiten) aus dem Fixture-Verzeichnis."""
+    index_pages, decision_pages = [], []
+    for p in sorted(fixtures_dir.glob("*.html")):
+        target = index_pages if p.name.startswith("index") else decision_pages
+        target.append((p.name, p.read_text(encoding="utf-8")))
+    return index_pages, decision_pages
+
+
+def load_cached_pages(cache_path: Path) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """(Index-Seiten, Entscheid-Seiten) direkt aus der SQLite-Datei des HTTP-Caches."""
+    db = sqlite3.connect(f"file:{cache_path}?mode=ro", uri=True)
+    try:
+        rows = db.execute("SELECT url, body FROM pages ORDER BY url").fetchall()
+    finally:
+        db.close()
+    index_pages, decision_pages = [], []
+    for url, body in rows:
+        html = zlib.decompress(body).decode("utf-8")
+        if "type=show_document" in url:
+            decision_pages.append((url, html))
+        elif "index_atf" in url:
+            index_pages.append((url, html))
+    return index_pages, decision_pages
+
+
+def build_cases(scraper, index_pages, decision_pages) -> list[tuple[str, Callable, list]]:
+    """(Name, Funktion mit einem Argument, Eingaben) pro gemessener Funktion.
+
+    BeautifulSoup-Bäume und Seitentexte werden vorab gebaut, damit
+    `parse_regeste`, `parse_urteilsnummer` und `normalize_ws` für sich
+    allein gemessen werden.
+    """
+    htmls = [html for _, html in decision_pages]
+    soups = [BeautifulSoup(html, "lxml") for html in htmls]
+    texts = [soup.get_text("\n", strip=True) for soup in soups]
+    links_inputs = [
+        (html, name if name.startswith("http") else DEFAULT_BASE_URL)
+        for name, html in index_pages
+    ]
+    cases = [
+        ("normalize_ws", scraper.normalize_ws, texts),
+        ("parse_regeste", scraper.parse_regeste, soups),
+        ("parse_urteilsnummer", scraper.parse_urteilsnummer, soups),
+        ("parse_page[bs4]", scraper.PARSERS["bs4"], htmls),
+        ("parse_page[lxml]", scraper.PARSERS["lxml"], htmls),
+        ("parse_decision[lxml]", fast_parser.parse_decision, htmls),
+    ]
+    if links_inputs:
+        cases.insert(0, (
+            "extract_decision_links",
+            lambda args: scraper.extract_decision_links(*args),
+            links_inputs,
+        ))
+    return cases
+
+
+# Mindestdauer eines Durchlaufs, damit wenige kleine Fixtures nicht im Rauschen untergehen
+MIN_ROUND_SECONDS = 0.2
+
+
+def _run(fn: Callable, inputs: list, passes: int) -> float:
+    start = time.perf_counter()
+    for _ in range(passes):
+        for item in inputs:
+            fn(item)
+    return time.perf_counter() - start
+
+
+def calls_per_second(fn: Callable, inputs: list, repeat: int) -> float:
+    """Bester von `repeat` Durchläufen; ein Durchlauf dauert mindestens MIN_ROUND_SECONDS."""
+    passes = 1
+    while (elapsed := _run(fn, inputs, passes)) < MIN_ROUND_SECONDS:
+        passes = max(passes * 2, int(passes * MIN_ROUND_SECONDS / max(elapsed, 1e-9)))
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, _run(fn, inputs, passes))
+    return passes * len(inputs) / best
+
+
+def peak_kib(fn: Callable, inputs: list) -> float:
+    """Spitzen-Speicher eines einzelnen Aufrufs (Maximum über alle Eingaben)."""
+    peak = 0
+    for item in inputs:
+        tracemalloc.start()
+        fn(item)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def check_backends(scraper, decision_pages) -> int:
+    """Alle Parser-Backends gegen die BeautifulSoup-Referenz prüfen."""
+    reference = scraper.PARSERS["bs4"]
+    mismatches = 0
+    for page, html in decision_pages:
+        expected = reference(html)
+        for name, parse in scraper.PARSERS.items():
+            if parse(html) != expected:
+                mismatches += 1
+                print(f"[ABWEICHUNG] {name}: {page}")
+    return mismatches
+
+
+def find_regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current["per_second"] < base["per_second"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {current['per_second']:.1f}/s statt {base['per_second']:.1f}/s"
+            )
+        if current["peak_kib"] > base["peak_kib"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {current['peak_kib']:.0f} KiB statt {base['peak_kib']:.0f} KiB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parser-Funktionen des Scrapers benchmarken")
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR)
+    parser.add_argument("--cache", type=Path, help="Seiten aus diesem HTTP-Cache statt aus --fixtures")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument(
+        "--threshold", type=float, default=THRESHOLD,
+        help=f"Erlaubte Verschlechterung gegenüber der Baseline (Standard: {THRESHOLD})",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="Aktuelle Messwerte als neue Baseline speichern",
+    )
+    args = parser.parse_args()
+
+    scraper = load_scraper()
+    if args.cache:
+        index_pages, decision_pages = load_cached_pages(args.cache)
+    else:
+        index_pages, decision_pages = load_fixture_pages(args.fixtures)
+    if not decision_pages:
+        sys.exit("Keine Seiten gefunden.")
+
+    mismatches = check_backends(scraper, decision_pages)
+
+    print(
+        f"{len(index_pages)} Index-Seiten, {len(decision_pages)} Entscheide, "
+        f"bester von {args.repeat} Durchläufen"
+    )
+    print(f"{'Funktion':<24} {'Aufrufe/s':>11} {'Spitze KiB':>11}")
+    print("-" * 48)
+    results = {}
+    for name, fn, inputs in build_cases(scraper, index_pages, decision_pages):
+        results[name] = {
+            "per_second": calls_per_second(fn, inputs, args.repeat),
+            "peak_kib": peak_kib(fn, inputs),
+        }
+        print(f"{name:<24} {results[name]['per_second']:>11.1f} {results[name]['peak_kib']:>11.0f}")
+
+    if mismatches:
+        sys.exit(f"{mismatches} abweichende Ergebnisse")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline gespeichert: {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressionen (> {args.threshold:.0%} gegenüber {args.baseline.name}):")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print(f"\nKeine Regression gegenüber {args.baseline.name}")
+
+
+if __name__ == "__main__":
+    main()
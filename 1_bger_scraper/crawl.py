@@ -0,0 +1,119 @@
+"""Crawl über mehrere Jahrgänge und Bände mit wiederaufnehmbarem Journal.
+
+Das Journal ist eine JSONL-Datei, an die nur angehängt wird:
+
+    {"event": "index", "url": ..., "links": [...]}   Index-Seite verarbeitet
+    {"event": "done", "urls": [...]}                 Entscheide geschrieben
+
+Beim Start wird es wieder eingelesen. Bereits verarbeitete Index-Seiten
+werden nicht erneut geladen, bereits extrahierte Entscheide übersprungen.
+Entscheide werden erst als erledigt markiert, wenn ihre Zeilen in der
+Ausgabe dauerhaft geschrieben sind (siehe sinks.py). Ein Abbruch kostet
+so höchstens den letzten, noch nicht geschriebenen Batch.
+"""
+
+import json
+from pathlib import Path
+
+
+INDEX_URL_TEMPLATE = (
+    "https://search.bger.ch/ext/eurospider/live/de/php/clir/http/index_atf.php"
+    "?year={year}&volume={volume}&lang=de&zoom=&system=clir"
+)
+
+VOLUMES = ["I", "II", "III", "IV", "V"]
+
+
+def index_url(year: int, volume: str) -> str:
+    return INDEX_URL_TEMPLATE.format(year=year, volume=volume)
+
+
+def parse_years(spec: str) -> list[int]:
+    """'151' → [151], '140-142,145' → [140, 141, 142, 145]."""
+    years = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(p) for p in part.split("-", 1))
+            if end < start:
+                raise ValueError(f"Ungültiger Bereich: {part}")
+            years.extend(range(start, end + 1))
+        else:
+            years.append(int(part))
+    return years
+
+
+def parse_volumes(spec: str) -> list[str]:
+    """'III' → ['III'], 'I,II' → ['I', 'II'], 'all' → alle Bände."""
+    if spec.strip().lower() == "all":
+        return list(VOLUMES)
+    volumes = [v.strip().upper() for v in spec.split(",") if v.strip()]
+    unknown = [v for v in volumes if v not in VOLUMES]
+    if unknown:
+        raise ValueError(f"Unbekannte Bände: {', '.join(unknown)} (erlaubt: {', '.join(VOLUMES)})")
+    return volumes
+
+
+def index_urls(years: list[int], volumes: list[str]) -> list[str]:
+    return [index_url(year, volume) for year in years for volume in volumes]
+
+
+class CrawlJournal:
+    """Append-only Checkpoint-Journal eines Crawls."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.index_links: dict[str, list[str]] = {}
+        self.done: set[str] = set()
+        if self.path.exists():
+            self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # letzte Zeile kann bei einem Absturz abgeschnitten sein
+                    continue
+                if entry["event"] == "index":
+                    self.index_links[entry["url"]] = entry["links"]
+                elif entry["event"] == "done":
+                    self.done.update(entry["urls"])
+
+    def _append(self, entry: dict) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def record_index(self, url: str, links: list[str]) -> None:
+        self.index_links[url] = links
+        self._append({"event": "index", "url": url, "links": links})
+
+    def record_done(self, urls: list[str]) -> None:
+        if not urls:
+            return
+        self.done.update(urls)
+        self._append({"event": "done", "urls": urls})
+
+    def frontier(self, index_pages: list[str]) -> list[str]:
+        """Alle Entscheid-URLs der verarbeiteten Index-Seiten (dedupliziert, Reihenfolge behalten)."""
+        seen = set()
+        out = []
+        for page in index_pages:
+            for url in self.index_links.get(page, []):
+                if url not in seen:
+                    seen.add(url)
+                    out.append(url)
+        return out
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,149 @@
+"""Schnelles Parser-Backend: lxml mit vorkompilierten XPath-Ausdrücken.
+
+Liefert dieselben Ergebnisse wie `parse_urteilsnummer` und `parse_regeste`
+im Hauptskript, baut aber keinen BeautifulSoup-Baum auf. Die Textknoten
+werden direkt aus dem lxml-Baum gelesen; für die Regeste werden nur die
+`div#regeste`-Blöcke angefasst.
+
+`parse_decision` zerlegt zusätzlich den Volltext in Abschnitte:
+Urteilskopf, Sachverhalt und Erwägungen (siehe `SECTIONS`).
+"""
+
+import re
+
+from lxml import etree
+
+
+URTEILSNUMMER_RE = re.compile(r"\b(?:BGE\s*)?(1[0-9]{2})\s+([IVX]+)\s+([0-9]{1,4})\b")
+_SPACES_RE = re.compile(r"[ \t]+")
+_NEWLINES_RE = re.compile(r"\n{3,}")
+
+# Wie BeautifulSoup.get_text(): Skripte, Styles und Kommentare zählen nicht als Text
+_PAGE_TEXT = etree.XPath(
+    "//text()[not(ancestor::script) and not(ancestor::style) and not(ancestor::template)]"
+)
+_REGESTE_DIVS = etree.XPath("//div[@id='regeste']")
+_REGESTE_LABEL = etree.XPath("(.//div[@class='big bold'])[1]")
+_REGESTE_CONTENT = etree.XPath(
+    "(.//div[contains(concat(' ', normalize-space(@class), ' '), ' paraatf ')])[1]"
+)
+_SUBTREE_TEXT = etree.XPath(".//text()")
+
+_PARAATF = "contains(concat(' ', normalize-space(@class), ' '), ' paraatf ')"
+# Regeste-Blöcke und oberste Absätze ausserhalb der Regeste, in Dokumentreihenfolge
+_SECTION_NODES = etree.XPath(
+    f"//div[@id='regeste'] | //div[{_PARAATF}]"
+    f"[not(ancestor::div[@id='regeste'])][not(ancestor::div[{_PARAATF}])]"
+)
+_SECTION_ANCESTOR = etree.XPath("ancestor::div[@id='sachverhalt' or @id='erwaegungen'][1]/@id")
+
+SECTIONS = ["kopf", "sachverhalt", "erwaegungen"]
+# Absatz, mit dem der Sachverhalt bzw. die Erwägungen beginnen (DE/FR/IT)
+_SACHVERHALT_START_RE = re.compile(r"^(?:Sachverhalt|Faits|Fatti|[A-Z]\.\s*[-–])")
+_ERWAEGUNGEN_START_RE = re.compile(
+    r"^(?:Aus den Erwägungen|Erwägungen|Extrait des considérants|Considérant|"
+    r"Considérants|Dai considerandi|Considerando|Considerandi)",
+    re.IGNORECASE,
+)
+
+_PARSER = etree.HTMLParser(encoding="utf-8")
+
+
+def parse_html(html: str) -> etree._Element:
+    # Als Bytes parsen: lxml lehnt str mit Encoding-Deklaration ab
+    return etree.fromstring(html.encode("utf-8"), _PARSER)
+
+
+def _normalize_ws(s: str) -> str:
+    s = _SPACES_RE.sub(" ", s)
+    s = _NEWLINES_RE.sub("\n\n", s)
+    return s.strip()
+
+
+def _stripped_text(el: etree._Element, sep: str) -> str:
+    return sep.join(t for t in (s.strip() for s in _SUBTREE_TEXT(el)) if t)
+
+
+def parse_urteilsnummer(root: etree._Element) -> str:
+    # Die Regex toleriert beliebigen Whitespace, normalize_ws ist daher nicht nötig
+    full_text = "\n".join(t for t in (s.strip() for s in _PAGE_TEXT(root)) if t)
+    m = URTEILSNUMMER_RE.search(full_text)
+    if not m:
+        return ""
+    return f"{m.group(1)} {m.group(2)} {m.group(3)}"
+
+
+def parse_regeste(root: etree._Element) -> str:
+    regesten = []
+    for div in _REGESTE_DIVS(root):
+        label_divs = _REGESTE_LABEL(div)
+        label = _stripped_text(label_divs[0], "") if label_divs else ""
+
+        content_divs = _REGESTE_CONTENT(div)
+        if not content_divs:
+            continue
+        content = _normalize_ws(_stripped_text(content_divs[0], " "))
+        if content:
+            regesten.append((label, content))
+
+    if not regesten:
+        return ""
+    if len(regesten) == 1:
+        return regesten[0][1]
+
+    parts = []
+    for label, content in regesten:
+        label_clean = label.replace("\u00a0", " ").strip()
+        parts.append(f"{label_clean}:\n{content}")
+    return "\n\n".join(parts)
+
+
+def parse_page(html: str) -> dict[str, str]:
+    """HTML eines Entscheids → {"urteilsnummer", "regeste"}."""
+    root = parse_html(html)
+    if root is None:
+        return {"urteilsnummer": "", "regeste": ""}
+    return {"urteilsnummer": parse_urteilsnummer(root), "regeste": parse_regeste(root)}
+
+
+def parse_sections(root: etree._Element) -> dict[str, str]:
+    """Volltext in Urteilskopf, Sachverhalt und Erwägungen aufteilen.
+
+    Liegen die Absätze in `div#sachverhalt` bzw. `div#erwaegungen`, wird
+    diese Zuordnung verwendet. Sonst gilt: vor der Regeste steht der
+    Urteilskopf, danach der Sachverhalt, ab "Aus den Erwägungen" (bzw.
+    "Extrait des considérants", "Dai considerandi") die Erwägungen.
+    """
+    parts: dict[str, list[str]] = {name: [] for name in SECTIONS}
+    current = "kopf"
+    for node in _SECTION_NODES(root):
+        if node.get("id") == "regeste":
+            if current == "kopf":
+                current = "sachverhalt"
+            continue
+
+        text = _normalize_ws(_stripped_text(node, " "))
+        if not text:
+            continue
+        explicit = _SECTION_ANCESTOR(node)
+        if explicit:
+            current = str(explicit[0])
+        elif current != "erwaegungen" and _ERWAEGUNGEN_START_RE.match(text):
+            current = "erwaegungen"
+        elif current == "kopf" and _SACHVERHALT_START_RE.match(text):
+            current = "sachverhalt"
+        parts[current].append(text)
+
+    return {name: "\n\n".join(paragraphs) for name, paragraphs in parts.items()}
+
+
+def parse_decision(html: str) -> dict[str, str]:
+    """Wie `parse_page`, zusätzlich mit den Abschnitten aus `parse_sections`."""
+    root = parse_html(html)
+    if root is None:
+        return {"urteilsnummer": "", "regeste": "", **{name: "" for name in SECTIONS}}
+    return {
+        "urteilsnummer": parse_urteilsnummer(root),
+        "regeste": parse_regeste(root),
+        **parse_sections(root),
+    }
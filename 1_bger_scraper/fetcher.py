@@ -0,0 +1,107 @@
+"""Nebenläufiges Abrufen von Seiten mit höflicher Rate-Begrenzung pro Host.
+
+Die Wartezeit zwischen zwei Anfragen an denselben Host wird über einen
+Token-Bucket eingehalten; mehrere Worker teilen sich dieses Budget. So
+bleibt die Last auf dem Server gleich, aber die Netzwerk-Latenz einzelner
+Anfragen überlappt sich, statt sich aufzusummieren.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TokenBucket:
+    """Token-Bucket: im Mittel `rate` Anfragen pro Sekunde, Spitzen bis `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate muss grösser als 0 sein")
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Blockiert, bis ein Token verfügbar ist, und verbraucht es."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Ein Token-Bucket pro Host (netloc), lazy angelegt."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+def make_session(pool_size: int) -> requests.Session:
+    """Session mit Keep-Alive-Pool, gross genug für alle Worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(pool_size, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _result(url: str, future: Future) -> tuple[str, str | Exception]:
+    try:
+        return url, future.result()
+    except (requests.RequestException, LookupError) as e:
+        return url, e
+
+
+def fetch_all(
+    urls: Iterable[str],
+    fetch: Callable[[str], str],
+    concurrency: int = 4,
+    limiter: HostRateLimiter | None = None,
+) -> Iterator[tuple[str, str | Exception]]:
+    """Ruft `urls` mit `concurrency` Threads ab.
+
+    Liefert `(url, html)` in der Reihenfolge der Eingabe. Netzwerkfehler und
+    Cache-Fehlschläge im Offline-Modus brechen den Lauf nicht ab, sondern
+    werden als `(url, exception)` geliefert. Es sind höchstens `2 * concurrency` Anfragen gleichzeitig
+    unterwegs bzw. gepuffert, damit der Speicher nicht mit der URL-Liste wächst.
+    """
+
+    def task(url: str) -> str:
+        if limiter is not None:
+            limiter.acquire(url)
+        return fetch(url)
+
+    window = max(concurrency, 1) * 2
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        pending: deque[tuple[str, Future]] = deque()
+        for url in urls:
+            pending.append((url, pool.submit(task, url)))
+            if len(pending) >= window:
+                yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
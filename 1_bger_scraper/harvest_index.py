@@ -0,0 +1,95 @@
+"""Index bereits geernteter Entscheide für inkrementelle Läufe.
+
+Pro Ausgabe wird in SQLite festgehalten, welche Entscheide (docid) mit
+welchem Ergebnis-Hash bereits geschrieben wurden. Ein inkrementeller Lauf
+vergleicht die aktuellen Index-Seiten damit und verarbeitet nur neue
+Entscheide; mit Revalidierung zusätzlich geänderte (anderer Hash).
+
+Der Hash deckt nur die geschriebenen Spalten ab. Wird ein bereits
+geschriebener Entscheid ersetzt, merkt sich der Index, dass die Ausgabe
+kompaktiert werden muss (`needs_compaction`); das überlebt auch einen
+Abbruch vor dem Kompaktieren.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+
+def docid_from_url(url: str) -> str:
+    """'...&highlight_docid=atf%3A%2F%2F151-III-1%3Ade&...' → 'atf://151-III-1:de'."""
+    values = parse_qs(urlsplit(url).query).get("highlight_docid")
+    return values[0] if values else url
+
+
+def result_hash(record: dict) -> str:
+    """Stabiler Hash eines extrahierten Datensatzes."""
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class HarvestIndex:
+    """docid → Hash des zuletzt geschriebenen Ergebnisses."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS decisions (
+                docid        TEXT PRIMARY KEY,
+                url          TEXT NOT NULL,
+                result_hash  TEXT NOT NULL,
+                harvested_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._db.commit()
+        self.hashes: dict[str, str] = dict(
+            self._db.execute("SELECT docid, result_hash FROM decisions")
+        )
+
+    def __contains__(self, docid: str) -> bool:
+        return docid in self.hashes
+
+    def get(self, docid: str) -> str | None:
+        return self.hashes.get(docid)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Ob die Ausgabe ersetzte (doppelte) Entscheide enthält."""
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'needs_compaction'").fetchone()
+        return row is not None
+
+    def mark_compacted(self) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM meta WHERE key = 'needs_compaction'")
+
+    def record(self, entries: list[tuple[str, str, str]]) -> None:
+        """`(docid, url, result_hash)`-Einträge in einer Transaktion speichern."""
+        if not entries:
+            return
+        now = time.time()
+        replaced = any(docid in self.hashes for docid, _, _ in entries)
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?)",
+                [(docid, url, h, now) for docid, url, h in entries],
+            )
+            if replaced:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('needs_compaction', '1')")
+        for docid, _, h in entries:
+            self.hashes[docid] = h
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "HarvestIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
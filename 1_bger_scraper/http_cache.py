@@ -0,0 +1,98 @@
+"""Persistenter HTTP-Cache für heruntergeladene Seiten.
+
+Jede Seite wird pro URL zlib-komprimiert in einer SQLite-Datei abgelegt,
+zusammen mit ETag und Last-Modified. Beim nächsten Lauf wird per
+Conditional GET nachgefragt; antwortet der Server mit 304, kommt der Inhalt
+aus dem Cache. Im Offline-Modus wird das Netz gar nicht mehr angefasst.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+
+class CacheMiss(LookupError):
+    """URL ist im Offline-Modus nicht im Cache vorhanden."""
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Header für eine Revalidierung per Conditional GET."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """URL → komprimierter Seiteninhalt, indexiert in SQLite (thread-sicher)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url           TEXT PRIMARY KEY,
+                    body          BLOB NOT NULL,
+                    etag          TEXT,
+                    last_modified TEXT,
+                    fetched_at    REAL NOT NULL
+                )"""
+            )
+            self._db.commit()
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        text = zlib.decompress(body).decode("utf-8")
+        return CachedPage(url, text, etag, last_modified, fetched_at)
+
+    def put(self, url: str, text: str, etag: str | None, last_modified: str | None) -> None:
+        body = zlib.compress(text.encode("utf-8"), 6)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, time.time()),
+            )
+            self._db.commit()
+
+    def touch(self, url: str) -> None:
+        """Zeitpunkt der letzten erfolgreichen Revalidierung (304) festhalten."""
+        with self._lock:
+            self._db.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "HttpCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
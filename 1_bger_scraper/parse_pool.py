@@ -0,0 +1,120 @@
+"""Parse-Stufe in einem Prozess-Pool, entkoppelt von den Downloads.
+
+    Download-Threads ──> begrenzte Queue ──> ProcessPoolExecutor ──> Ergebnisse
+
+Ein Feeder-Thread schiebt die heruntergeladenen Seiten in eine Queue mit
+fester Grösse. Der Hauptthread verteilt sie an die Parser-Prozesse und
+liefert die Ergebnisse in der ursprünglichen Reihenfolge. Ist die Queue
+voll, blockiert der Feeder und damit auch das Nachladen neuer Seiten
+(Backpressure); der Speicherbedarf bleibt unabhängig von der Korpusgrösse.
+"""
+
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+
+_DONE = object()
+
+
+class _FeederError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _parse_inline(
+    pages: Iterable[tuple[str, str | Exception]],
+    parse: Callable[[str], Any],
+) -> Iterator[tuple[str, Any]]:
+    for url, html in pages:
+        if isinstance(html, Exception):
+            yield url, html
+            continue
+        try:
+            yield url, parse(html)
+        except Exception as e:
+            yield url, e
+
+
+def parse_in_pool(
+    pages: Iterable[tuple[str, str | Exception]],
+    parse: Callable[[str], Any],
+    workers: int,
+    queue_size: int = 64,
+) -> Iterator[tuple[str, Any]]:
+    """Wendet `parse` in `workers` Prozessen auf `(url, html)`-Paare an.
+
+    Liefert `(url, ergebnis)` in Eingabereihenfolge. Fehler beim Download
+    (Exception statt HTML) werden unverändert durchgereicht, Fehler beim
+    Parsen als `(url, exception)` geliefert. `parse` muss pickelbar sein,
+    also eine Funktion auf Modulebene. Mit `workers <= 0` wird im
+    aufrufenden Thread geparst.
+    """
+    if workers <= 0:
+        yield from _parse_inline(pages, parse)
+        return
+
+    pages_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages_q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def feed() -> None:
+        try:
+            for item in pages:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_FeederError(e))
+        finally:
+            put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="page-feeder", daemon=True)
+    feeder.start()
+
+    pending: deque[tuple[str, Future | Exception]] = deque()
+
+    def pop() -> tuple[str, Any]:
+        url, job = pending.popleft()
+        if isinstance(job, Exception):
+            return url, job
+        try:
+            return url, job.result()
+        except Exception as e:
+            return url, e
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                item = pages_q.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _FeederError):
+                    raise item.error
+                url, html = item
+                job = html if isinstance(html, Exception) else pool.submit(parse, html)
+                pending.append((url, job))
+
+                # fertige Ergebnisse sofort weitergeben, bei vollem Fenster auf das älteste warten
+                while pending and (
+                    len(pending) >= queue_size
+                    or isinstance(pending[0][1], Exception)
+                    or pending[0][1].done()
+                ):
+                    yield pop()
+
+            while pending:
+                yield pop()
+    finally:
+        stop.set()
+        feeder.join()
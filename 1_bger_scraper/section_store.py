@@ -0,0 +1,135 @@
+"""Komprimierter Speicher für die Volltext-Abschnitte der Entscheide.
+
+Jeder Abschnitt (Regeste, Urteilskopf, Sachverhalt, Erwägungen) wird
+einzeln komprimiert und als Block an `sections.dat` angehängt. Ein
+Offset-Index in `sections.sqlite` hält pro (docid, Abschnitt) fest, wo der
+Block liegt. Für einen einzelnen Abschnitt wird also genau ein Block
+gelesen und entpackt, nie der ganze Korpus.
+
+Komprimiert wird mit zstd (Python 3.14 `compression.zstd` oder das Paket
+`zstandard`, optional: `uv sync --extra zstd`), sonst mit zlib. Der Codec
+steht pro Block im Index, ältere Blöcke bleiben also lesbar.
+"""
+
+import sqlite3
+import zlib
+from pathlib import Path
+
+try:
+    from compression import zstd as _zstd
+
+    def _zstd_compress(data: bytes) -> bytes:
+        return _zstd.compress(data, level=10)
+
+    _zstd_decompress = _zstd.decompress
+except ImportError:
+    try:
+        import zstandard as _zstandard
+
+        def _zstd_compress(data: bytes) -> bytes:
+            return _zstandard.ZstdCompressor(level=10).compress(data)
+
+        def _zstd_decompress(data: bytes) -> bytes:
+            return _zstandard.ZstdDecompressor().decompress(data)
+    except ImportError:
+        _zstd_compress = _zstd_decompress = None
+
+
+DEFAULT_CODEC = "zstd" if _zstd_compress is not None else "zlib"
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return _zstd_compress(data)
+    return zlib.compress(data, 9)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if _zstd_decompress is None:
+            raise RuntimeError("Block ist zstd-komprimiert, aber zstd ist nicht installiert")
+        return _zstd_decompress(data)
+    return zlib.decompress(data)
+
+
+class SectionStore:
+    """Append-only Blockdatei mit Offset-Index, adressiert über (docid, Abschnitt)."""
+
+    def __init__(self, path: str | Path, codec: str = DEFAULT_CODEC):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.codec = codec
+        self._data = open(self.path / "sections.dat", "a+b")
+        self._db = sqlite3.connect(str(self.path / "sections.sqlite"))
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS blocks (
+                docid      TEXT NOT NULL,
+                section    TEXT NOT NULL,
+                offset     INTEGER NOT NULL,
+                length     INTEGER NOT NULL,
+                raw_length INTEGER NOT NULL,
+                codec      TEXT NOT NULL,
+                PRIMARY KEY (docid, section)
+            )"""
+        )
+        self._db.commit()
+        self._pending: list[tuple] = []
+
+    def put(self, docid: str, sections: dict[str, str]) -> None:
+        """Abschnitte eines Entscheids anhängen; im Index erst nach `checkpoint()`."""
+        self._data.seek(0, 2)
+        for section, text in sections.items():
+            raw = text.encode("utf-8")
+            block = _compress(raw, self.codec)
+            offset = self._data.tell()
+            self._data.write(block)
+            self._pending.append((docid, section, offset, len(block), len(raw), self.codec))
+
+    def checkpoint(self) -> None:
+        """Blöcke auf die Platte bringen, danach den Index committen.
+
+        Bricht der Lauf dazwischen ab, bleiben höchstens unreferenzierte
+        Bytes am Dateiende zurück; der Index zeigt nie auf fehlende Daten.
+        """
+        self._data.flush()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?)", self._pending
+            )
+        self._pending.clear()
+
+    def get(self, docid: str, section: str) -> str | None:
+        row = self._db.execute(
+            "SELECT offset, length, codec FROM blocks WHERE docid = ? AND section = ?",
+            (docid, section),
+        ).fetchone()
+        if row is None:
+            return None
+        offset, length, codec = row
+        self._data.seek(offset)
+        return _decompress(self._data.read(length), codec).decode("utf-8")
+
+    def sections(self, docid: str) -> list[str]:
+        rows = self._db.execute(
+            "SELECT section FROM blocks WHERE docid = ? ORDER BY offset", (docid,)
+        )
+        return [r[0] for r in rows]
+
+    def stats(self) -> dict:
+        """Anzahl Entscheide und Blöcke, Roh- und komprimierte Grösse."""
+        docs, blocks, raw, stored = self._db.execute(
+            "SELECT COUNT(DISTINCT docid), COUNT(*), COALESCE(SUM(raw_length), 0), "
+            "COALESCE(SUM(length), 0) FROM blocks"
+        ).fetchone()
+        return {"docs": docs, "blocks": blocks, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self) -> None:
+        self.checkpoint()
+        self._data.close()
+        self._db.close()
+
+    def __enter__(self) -> "SectionStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
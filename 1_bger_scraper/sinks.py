@@ -0,0 +1,323 @@
+"""Streamende Ausgabe-Sinks für extrahierte Entscheide (CSV, JSONL, Parquet).
+
+Datensätze werden gepuffert und in Batches geschrieben, statt erst am Ende
+des Laufs. Alle Sinks hängen an vorhandene Ausgaben an, damit ein
+fortgesetzter Crawl (siehe crawl.py) nahtlos weiterschreibt.
+
+`checkpoint()` macht alles bisher Geschriebene dauerhaft; erst danach
+dürfen die Entscheide im Journal als erledigt gelten. `checkpoint_rows`
+gibt an, nach wie vielen Zeilen sich ein Checkpoint lohnt.
+
+Parquet braucht pyarrow (optional: `uv sync --extra parquet`). Geschrieben
+wird ein Verzeichnis mit Part-Dateien; jeder Batch wird eine Row Group.
+Eine Part-Datei entsteht unter einem temporären Punkt-Namen (den pyarrow
+beim Lesen ignoriert) und wird erst beim Checkpoint umbenannt; ein
+abgebrochener Lauf hinterlässt also keine kaputte Part-Datei.
+
+Wird ein Entscheid neu geschrieben (geänderter Inhalt), steht er danach
+zweimal in der Ausgabe; `compact()` behält pro Schlüssel nur die letzte
+Zeile.
+"""
+
+import csv
+import json
+import os
+import shutil
+from pathlib import Path
+
+
+FORMATS = ["csv", "jsonl", "parquet"]
+BATCH_SIZE = 500
+# Parquet: Row Groups pro Part-Datei (eine Datei ist erst nach dem Schliessen lesbar)
+ROW_GROUPS_PER_FILE = 10
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Für Parquet wird pyarrow benötigt: uv sync --extra parquet"
+        ) from e
+    return pyarrow, pyarrow.parquet
+
+
+class CsvSink:
+    """Semikolon-CSV (DE/CH-Excel), Header nur in einer neuen Datei."""
+
+    def __init__(self, path: str | Path, fields: list[str], batch_size: int = BATCH_SIZE):
+        self.path = Path(path)
+        self.fields = fields
+        self.batch_size = batch_size
+        self.checkpoint_rows = batch_size
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        if not new_file:
+            with open(self.path, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f, delimiter=";"), [])
+            if header != fields:
+                raise ValueError(
+                    f"{self.path} hat die Spalten {header}, erwartet {fields}; neu beginnen mit --restart"
+                )
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter=";")
+        self._buffer: list[list] = []
+        if new_file:
+            self._writer.writerow(fields)
+
+    def write(self, record: dict) -> None:
+        self._buffer.append([record.get(f, "") for f in self.fields])
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._writer.writerows(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+
+    def checkpoint(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JsonlSink:
+    """Ein JSON-Objekt pro Zeile."""
+
+    def __init__(self, path: str | Path, fields: list[str], batch_size: int = BATCH_SIZE):
+        self.path = Path(path)
+        self.fields = fields
+        self.batch_size = batch_size
+        self.checkpoint_rows = batch_size
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._buffer: list[str] = []
+
+    def write(self, record: dict) -> None:
+        row = {f: record.get(f, "") for f in self.fields}
+        self._buffer.append(json.dumps(row, ensure_ascii=False) + "\n")
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._file.writelines(self._buffer)
+        self._buffer.clear()
+        self._file.flush()
+
+    def checkpoint(self) -> None:
+        self.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class ParquetSink:
+    """Parquet-Dataset: Verzeichnis mit `part-NNNNN.parquet`, ein Batch = eine Row Group."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        fields: list[str],
+        batch_size: int = BATCH_SIZE,
+        row_groups_per_file: int = ROW_GROUPS_PER_FILE,
+    ):
+        self._pa, self._pq = _require_pyarrow()
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fields = fields
+        self.batch_size = batch_size
+        self.checkpoint_rows = batch_size * row_groups_per_file
+        self._schema = self._pa.schema([(f, self._pa.string()) for f in fields])
+        # Überreste eines abgebrochenen Laufs (nie fertig geschriebene Parts)
+        for stale in self.path.glob(".part-*.tmp"):
+            stale.unlink()
+        parts = sorted(self.path.glob("part-*.parquet"))
+        if parts and self._pq.read_schema(parts[0]).names != fields:
+            raise ValueError(
+                f"{self.path} hat andere Spalten als {fields}; neu beginnen mit --restart"
+            )
+        self._next_part = len(parts)
+        self._writer = None
+        self._part: Path | None = None
+        self._columns: dict[str, list] = {f: [] for f in fields}
+        self._buffered = 0
+
+    def write(self, record: dict) -> None:
+        for f in self.fields:
+            self._columns[f].append(record.get(f, ""))
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffered:
+            return
+        if self._writer is None:
+            self._part = self.path / f"part-{self._next_part:05d}.parquet"
+            self._next_part += 1
+            self._writer = self._pq.ParquetWriter(
+                self._tmp_name(self._part), self._schema, compression="zstd"
+            )
+        table = self._pa.table(self._columns, schema=self._schema)
+        self._writer.write_table(table, row_group_size=self.batch_size)
+        self._columns = {f: [] for f in self.fields}
+        self._buffered = 0
+
+    @staticmethod
+    def _tmp_name(part: Path) -> Path:
+        return part.with_name(f".{part.name}.tmp")
+
+    def checkpoint(self) -> None:
+        # Footer schreiben: erst danach ist die Part-Datei lesbar
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._tmp_name(self._part), self._part)
+
+    def close(self) -> None:
+        self.checkpoint()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_sink(fmt: str, path: str | Path, fields: list[str], batch_size: int = BATCH_SIZE):
+    if fmt == "csv":
+        return CsvSink(path, fields, batch_size)
+    if fmt == "jsonl":
+        return JsonlSink(path, fields, batch_size)
+    if fmt == "parquet":
+        return ParquetSink(path, fields, batch_size)
+    raise ValueError(f"Unbekanntes Format: {fmt} (erlaubt: {', '.join(FORMATS)})")
+
+
+def _last_positions(keys) -> dict[str, int]:
+    """Pro Schlüssel die Position seiner letzten Zeile (leere Schlüssel zählen nicht)."""
+    return {k: i for i, k in enumerate(keys) if k}
+
+
+def _finish_parquet_swap(path: Path, tmp: Path, old: Path) -> None:
+    """Einen abgebrochenen Verzeichnistausch zu Ende führen (idempotent).
+
+    Der Tausch läuft als path -> old, tmp -> path, old löschen. Fehlt `path`
+    neben `old`, war `tmp` schon fertig geschrieben und wird nachgezogen.
+    """
+    if not old.exists():
+        return
+    if not path.exists():
+        tmp.rename(path)
+    shutil.rmtree(old)
+
+
+def compact(fmt: str, path: str | Path, key: str) -> int:
+    """Pro `key` nur die zuletzt geschriebene Zeile behalten.
+
+    Zwei Durchgänge: der erste liest nur die Schlüssel, der zweite schreibt
+    die behaltenen Zeilen gestreamt (Parquet Part für Part) daneben neu.
+    Erst dann wird die Ausgabe ersetzt; ein Abbruch lässt die alte Ausgabe
+    stehen, und der nächste Aufruf räumt Überreste auf.
+
+    Returns:
+        Anzahl entfernter Zeilen.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".compact")
+    if fmt == "parquet":
+        _finish_parquet_swap(path, tmp, path.with_name(path.name + ".old"))
+    if not path.exists():
+        return 0
+    if fmt == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f, delimiter=";")
+            col = next(reader).index(key)
+            last = _last_positions(row[col] for row in reader)
+        removed = 0
+        with open(path, newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            reader = csv.reader(src, delimiter=";")
+            writer = csv.writer(dst, delimiter=";")
+            writer.writerow(next(reader))
+            for i, row in enumerate(reader):
+                if row[col] and last[row[col]] != i:
+                    removed += 1
+                else:
+                    writer.writerow(row)
+        os.replace(tmp, path)
+    elif fmt == "jsonl":
+        def keys(f):
+            return (json.loads(line).get(key, "") for line in f if line.strip())
+
+        with open(path, encoding="utf-8") as f:
+            last = _last_positions(keys(f))
+        removed = 0
+        with open(path, encoding="utf-8") as src, open(tmp, "w", encoding="utf-8") as dst:
+            lines = (line for line in src if line.strip())
+            for i, line in enumerate(lines):
+                k = json.loads(line).get(key, "")
+                if k and last[k] != i:
+                    removed += 1
+                else:
+                    dst.write(line)
+        os.replace(tmp, path)
+    elif fmt == "parquet":
+        pa, pq = _require_pyarrow()
+        parts = sorted(path.glob("part-*.parquet"))
+        if not parts:
+            return 0
+        # Position = (Part, Zeile im Part); nur die Schlüsselspalte im Speicher
+        last: dict[str, tuple[int, int]] = {}
+        for n, part in enumerate(parts):
+            for i, k in enumerate(pq.read_table(part, columns=[key]).column(key).to_pylist()):
+                if k:
+                    last[k] = (n, i)
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        removed = 0
+        written = 0
+        for n, part in enumerate(parts):
+            table = pq.read_table(part)
+            keep = [
+                i for i, k in enumerate(table.column(key).to_pylist())
+                if not k or last[k] == (n, i)
+            ]
+            removed += table.num_rows - len(keep)
+            if keep:
+                # fortlaufend nummeriert, damit ParquetSink danach anschliesst
+                pq.write_table(
+                    table.take(keep), tmp / f"part-{written:05d}.parquet",
+                    row_group_size=BATCH_SIZE, compression="zstd",
+                )
+                written += 1
+        old = path.with_name(path.name + ".old")
+        path.rename(old)
+        _finish_parquet_swap(path, tmp, old)
+    else:
+        raise ValueError(f"Unbekanntes Format: {fmt} (erlaubt: {', '.join(FORMATS)})")
+    return removed
+
+
+def read_parquet(path: str | Path, columns: list[str] | None = None):
+    """Parquet-Ausgabe als pyarrow.Table lesen (memory-mapped, nur die gewünschten Spalten).
+
+    Beispiel: `read_parquet("bge_151_iii_regesten.parquet", ["regeste"])["regeste"]`
+    """
+    _, pq = _require_pyarrow()
+    return pq.read_table(path, columns=columns, memory_map=True)
@@ -0,0 +1,171 @@
+"""OpenAI Batch API: submit pending documents as batch jobs instead of one call each.
+
+Flow: pending prompts -> JSONL input file -> upload -> batch job -> poll ->
+stream the output file back. The pipeline (see pipeline.run_batch) fans
+the results out into output/<case_id>/ and progress.json.
+
+Submitted jobs are recorded in config.BATCH_STATE_FILE together with their
+input file, so an interrupted run resumes polling instead of submitting
+the same documents twice.
+
+For offline tests, point the client at the local stand-in endpoint:
+
+    uv run python batch_stub.py
+    OPENAI_BASE_URL=http://127.0.0.1:8010/v1 uv run python main.py generate-all --batch
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from openai import OpenAI
+
+import config
+import generator
+
+ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def get_client() -> OpenAI:
+    """Shared client (same connection pool), with SDK retries for the few batch calls."""
+    return generator.get_client().with_options(max_retries=2)
+
+
+def make_custom_id(case_id: str, index: int) -> str:
+    return f"{case_id}:{index}"
+
+
+def parse_custom_id(custom_id: str) -> tuple[str, int]:
+    case_id, index = custom_id.rsplit(":", 1)
+    return case_id, int(index)
+
+
+def load_jobs() -> list[dict]:
+    """Open batch jobs of an earlier run: [{"id": ..., "input_file": ...}]."""
+    if config.BATCH_STATE_FILE.exists():
+        with open(config.BATCH_STATE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return []
+
+
+def save_jobs(jobs: list[dict]) -> None:
+    config.BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = config.BATCH_STATE_FILE.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f, indent=2)
+    tmp_path.replace(config.BATCH_STATE_FILE)
+
+
+def read_custom_ids(input_file: str | Path) -> set[str]:
+    """custom_ids of all requests in a batch input file (documents still in flight)."""
+    return {custom_id for custom_id, _ in iter_requests(input_file)}
+
+
+def iter_requests(input_file: str | Path) -> Iterator[tuple[str, dict]]:
+    """(custom_id, request body) of every request in a batch input file."""
+    with open(input_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["custom_id"], entry["body"]
+
+
+def write_input_files(
+    requests: Iterable[tuple[str, dict]],
+    prefix: str,
+    max_requests: int = config.BATCH_MAX_REQUESTS,
+    max_bytes: int = config.BATCH_MAX_BYTES,
+) -> list[Path]:
+    """Write (custom_id, body) pairs as batch JSONL files, split at the API limits."""
+    config.BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+    f = None
+    n_requests = n_bytes = 0
+    try:
+        for custom_id, body in requests:
+            line = json.dumps(
+                {"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body},
+                ensure_ascii=False,
+            ) + "\n"
+            size = len(line.encode("utf-8"))
+            if f is None or n_requests >= max_requests or n_bytes + size > max_bytes:
+                if f is not None:
+                    f.close()
+                path = config.BATCH_DIR / f"{prefix}_{len(paths):03d}.jsonl"
+                paths.append(path)
+                f = open(path, "w", encoding="utf-8")
+                n_requests = n_bytes = 0
+            f.write(line)
+            n_requests += 1
+            n_bytes += size
+    finally:
+        if f is not None:
+            f.close()
+    return paths
+
+
+def submit(client: OpenAI, input_file: Path) -> str:
+    """Upload an input file and start a batch job. Returns the batch id."""
+    with open(input_file, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    job = client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=ENDPOINT,
+        completion_window="24h",
+        metadata={"source": input_file.name},
+    )
+    return job.id
+
+
+def wait_for_jobs(
+    client: OpenAI,
+    batch_ids: list[str],
+    poll_interval: float = config.BATCH_POLL_INTERVAL,
+) -> Iterator:
+    """Poll the given jobs and yield each one as soon as it reaches a final state."""
+    open_ids = list(batch_ids)
+    while open_ids:
+        for batch_id in list(open_ids):
+            job = client.batches.retrieve(batch_id)
+            if job.status in TERMINAL_STATES:
+                open_ids.remove(batch_id)
+                yield job
+            else:
+                counts = job.request_counts
+                done = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+                print(f"  Batch {batch_id}: {job.status} ({done})")
+        if open_ids:
+            time.sleep(poll_interval)
+
+
+def _iter_file_lines(client: OpenAI, file_id: str) -> Iterator[dict]:
+    with client.files.with_streaming_response.content(file_id) as response:
+        for line in response.iter_lines():
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_results(client: OpenAI, job) -> Iterator[tuple[str, str | None, str | None, dict | None]]:
+    """Yield (custom_id, content, error, usage) for every answered request of a finished job."""
+    for file_id in (job.output_file_id, job.error_file_id):
+        if not file_id:
+            continue
+        for entry in _iter_file_lines(client, file_id):
+            custom_id = entry["custom_id"]
+            response = entry.get("response") or {}
+            if entry.get("error"):
+                yield custom_id, None, entry["error"].get("message", str(entry["error"])), None
+            elif response.get("status_code") != 200:
+                error = response.get("body", {}).get("error", {})
+                yield custom_id, None, f"HTTP {response.get('status_code')}: {error.get('message', '')}", None
+            else:
+                body = response["body"]
+                content = body["choices"][0]["message"]["content"]
+                if not content or not content.strip():
+                    yield custom_id, None, "Leere Antwort vom Modell erhalten", body.get("usage")
+                else:
+                    yield custom_id, content, None, body.get("usage")
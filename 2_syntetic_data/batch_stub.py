@@ -0,0 +1,253 @@
+"""Local stand-in for the OpenAI Files and Batch API (standard library only).
+
+Implements just enough of the API for `generate-all --batch` to run
+offline: upload a file, create/poll/cancel a batch and download the
+output and error files. Every request in a batch is answered with a
+placeholder document after `--delay` seconds; `--fail-rate` lets a share
+of the requests fail so the error path can be exercised too. The
+placeholder follows the prompt: one heading per item of the expected
+structure, in the document's language and within its word range, so it
+passes the checks in doc_checks.py.
+
+    uv run python batch_stub.py [--port 8010] [--delay 2] [--fail-rate 0.1]
+    OPENAI_BASE_URL=http://127.0.0.1:8010/v1 uv run python main.py generate-all --batch
+
+State is kept in memory only; restarting the stub forgets all jobs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import email.policy
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLACEHOLDER_PARAGRAPHS = {
+    "DE": (
+        "Dies ist ein Platzhaltertext des lokalen Batch-Stubs. Er ersetzt das "
+        "generierte Dokument, damit der Batch-Modus ohne API-Zugang getestet "
+        "werden kann, und die Pruefung der Sprache und der Struktur ist dabei "
+        "nicht abgeschaltet."
+    ),
+    "FR": (
+        "Ceci est un texte de remplacement du stub local. Il remplace le document "
+        "pour que le mode batch puisse être testé sans accès à l'API, et les "
+        "contrôles de la langue et de la structure sont appliqués par le pipeline."
+    ),
+}
+
+_files: dict[str, dict] = {}
+_batches: dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+
+def _store_file(data: bytes, filename: str, purpose: str) -> dict:
+    file_id = _new_id("file")
+    meta = {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(data),
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+    }
+    with _lock:
+        _files[file_id] = {"meta": meta, "data": data}
+    return meta
+
+
+def _placeholder_document(custom_id: str, prompt: str) -> str:
+    """Placeholder with the structure, language and length the prompt asks for."""
+    sprache = "FR" if "## Structure attendue" in prompt else "DE"
+    sections = re.findall(r"^  - (.+)$", prompt, re.M) or ["Inhalt"]
+    paragraph = PLACEHOLDER_PARAGRAPHS[sprache]
+    words = len(paragraph.split())
+    if m := re.search(r"(\d+)–(\d+) (?:Wörter|mots)", prompt):
+        target = (int(m.group(1)) + int(m.group(2))) // 2
+    else:
+        target = 300
+    repeat = max(1, target // (words * len(sections)))
+    body = [f"## {section}\n\n" + " ".join([paragraph] * repeat) for section in sections]
+    return "\n\n".join([f"[{custom_id}]"] + body)
+
+
+def _completion(request: dict) -> dict:
+    body = request["body"]
+    content = _placeholder_document(request["custom_id"], body["messages"][-1]["content"])
+    return {
+        "id": _new_id("chatcmpl"),
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+    }
+
+
+def _process(batch_id: str, delay: float, fail_rate: float) -> None:
+    time.sleep(delay / 2)
+    with _lock:
+        job = _batches[batch_id]
+        if job["status"] == "cancelling":
+            job["status"] = "cancelled"
+            return
+        job["status"] = "in_progress"
+        job["in_progress_at"] = int(time.time())
+        lines = _files[job["input_file_id"]]["data"].decode("utf-8").splitlines()
+    requests = [json.loads(line) for line in lines if line.strip()]
+    job["request_counts"]["total"] = len(requests)
+    time.sleep(delay / 2)
+
+    output, errors = [], []
+    for request in requests:
+        entry = {"id": _new_id("batch_req"), "custom_id": request["custom_id"], "error": None}
+        if random.random() < fail_rate:
+            entry["response"] = {
+                "status_code": 500,
+                "request_id": _new_id("req"),
+                "body": {"error": {"message": "Simulierter Fehler des Batch-Stubs", "type": "server_error"}},
+            }
+            errors.append(entry)
+        else:
+            entry["response"] = {"status_code": 200, "request_id": _new_id("req"), "body": _completion(request)}
+            output.append(entry)
+
+    def to_jsonl(entries: list[dict]) -> bytes:
+        return "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries).encode("utf-8")
+
+    output_file = _store_file(to_jsonl(output), f"{batch_id}_output.jsonl", "batch_output")
+    error_file = _store_file(to_jsonl(errors), f"{batch_id}_error.jsonl", "batch_output") if errors else None
+    with _lock:
+        job.update(
+            status="cancelled" if job["status"] == "cancelling" else "completed",
+            output_file_id=output_file["id"],
+            error_file_id=error_file["id"] if error_file else None,
+            completed_at=int(time.time()),
+            request_counts={"total": len(requests), "completed": len(output), "failed": len(errors)},
+        )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 2.0
+    fail_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self) -> None:
+        self._send_json({"error": {"message": f"Unbekannter Pfad: {self.path}", "type": "invalid_request_error"}}, 404)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        if m := re.fullmatch(r"/v1/batches/([\w-]+)", self.path):
+            with _lock:
+                job = _batches.get(m.group(1))
+                payload = dict(job) if job else None
+            return self._send_json(payload) if payload else self._not_found()
+        if m := re.fullmatch(r"/v1/files/([\w-]+)/content", self.path):
+            stored = _files.get(m.group(1))
+            if stored is None:
+                return self._not_found()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(stored["data"])))
+            self.end_headers()
+            self.wfile.write(stored["data"])
+            return
+        if m := re.fullmatch(r"/v1/files/([\w-]+)", self.path):
+            stored = _files.get(m.group(1))
+            return self._send_json(stored["meta"]) if stored else self._not_found()
+        self._not_found()
+
+    def do_POST(self):
+        if self.path == "/v1/files":
+            # multipart/form-data mit den Feldern "purpose" und "file"
+            header = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8")
+            message = BytesParser(policy=email.policy.HTTP).parsebytes(header + self._read_body())
+            fields, filename, data = {}, "upload.jsonl", b""
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if name == "file":
+                    filename = part.get_filename() or filename
+                    data = part.get_payload(decode=True)
+                else:
+                    fields[name] = part.get_payload(decode=True).decode("utf-8")
+            return self._send_json(_store_file(data, filename, fields.get("purpose", "batch")))
+
+        if self.path == "/v1/batches":
+            params = json.loads(self._read_body())
+            if params.get("input_file_id") not in _files:
+                return self._send_json({"error": {"message": "input_file_id unbekannt", "type": "invalid_request_error"}}, 400)
+            batch_id = _new_id("batch")
+            job = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": params["endpoint"],
+                "input_file_id": params["input_file_id"],
+                "completion_window": params.get("completion_window", "24h"),
+                "status": "validating",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": int(time.time()),
+                "metadata": params.get("metadata"),
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            }
+            with _lock:
+                _batches[batch_id] = job
+            threading.Thread(
+                target=_process, args=(batch_id, self.delay, self.fail_rate), daemon=True
+            ).start()
+            return self._send_json(job)
+
+        if m := re.fullmatch(r"/v1/batches/([\w-]+)/cancel", self.path):
+            with _lock:
+                job = _batches.get(m.group(1))
+                if job and job["status"] in ("validating", "in_progress"):
+                    job["status"] = "cancelling"
+                payload = dict(job) if job else None
+            return self._send_json(payload) if payload else self._not_found()
+        self._not_found()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Ersatz fuer die OpenAI Batch-API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--delay", type=float, default=2.0, help="Sekunden bis ein Batch fertig ist")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Anteil fehlschlagender Anfragen (0-1)")
+    args = parser.parse_args()
+
+    StubHandler.delay = args.delay
+    StubHandler.fail_rate = args.fail_rate
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Batch-Stub laeuft auf http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Content-addressed on-disk cache for chat completions.
+
+The key is the SHA-256 of the complete request body (model, system
+prompt, user prompt and parameters such as max_completion_tokens, as
+canonical JSON). An unchanged prompt is therefore answered from disk,
+e.g. after a crash or after editing the template of another document
+type; any change to the prompt or the parameters is a miss.
+
+Entries are zlib-compressed in SQLite (WAL, several processes on one host
+may share the file). When the cache grows beyond `max_bytes`, the least
+recently used entries are evicted. `merge_from()` imports the entries of
+another cache file (e.g. of a shard).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+import config
+
+
+class CacheMiss(LookupError):
+    """Raised in cache-only mode when a request is not in the cache."""
+
+
+def request_key(request: dict) -> str:
+    payload = json.dumps(request, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """sha256(request) -> completion text, with size-based LRU eviction."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_bytes: int = config.COMPLETION_CACHE_MAX_BYTES,
+    ):
+        # erst hier auflesen: bei --shard zeigt config auf das Shard-Verzeichnis
+        self.path = Path(path or config.COMPLETION_CACHE_FILE)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS completions (
+                key        TEXT PRIMARY KEY,
+                model      TEXT NOT NULL,
+                content    BLOB NOT NULL,
+                size       INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS completions_lru ON completions (last_used)")
+        self._db.commit()
+        # laufende Summe, damit nicht jedes put() die ganze Tabelle summiert
+        self._total = self.total_bytes()
+
+    def get(self, request: dict) -> str | None:
+        key = request_key(request)
+        row = self._db.execute("SELECT content FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self._db:
+            self._db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (time.time(), key))
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, request: dict, content: str) -> None:
+        self.put_key(request_key(request), request.get("model", ""), content)
+
+    def put_key(self, key: str, model: str, content: str) -> None:
+        """Store under a precomputed request_key (e.g. for batch results)."""
+        blob = zlib.compress(content.encode("utf-8"), 6)
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, blob, len(blob), now, now),
+            )
+        self._total += len(blob)
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def total_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits into max_bytes."""
+        self._total = self.total_bytes()
+        excess = self._total - self.max_bytes
+        if excess <= 0:
+            return 0
+        keys, freed = [], 0
+        for key, size in self._db.execute("SELECT key, size FROM completions ORDER BY last_used"):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        with self._db:
+            self._db.executemany("DELETE FROM completions WHERE key = ?", keys)
+        self._total -= freed
+        return len(keys)
+
+    def merge_from(self, other: str | Path) -> int:
+        """Import the entries of another cache file; existing keys are kept.
+
+        Returns the number of new entries.
+        """
+        self._db.execute("ATTACH DATABASE ? AS other", (str(other),))
+        try:
+            with self._db:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO completions SELECT * FROM other.completions"
+                )
+                count = cursor.rowcount
+        finally:
+            self._db.execute("DETACH DATABASE other")
+        if count:
+            self._total = self.total_bytes()
+            if self._total > self.max_bytes:
+                self.evict()
+        return count
+
+    def stats(self) -> dict:
+        entries, size = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions"
+        ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._db.close()
@@ -7,13 +7,65 @@ BASE_DIR = Path(__file__).parent
 load_dotenv(BASE_DIR / ".env")
 DATA_DIR = BASE_DIR / "data"
 OUTPUT_DIR = BASE_DIR / "output"
+# Konsolidierter Datensatz (--dataset jsonl|parquet), siehe dataset.py
+DATASET_DIR = BASE_DIR / "dataset"
+DATASET_PART_ROWS = 10_000
+# Zeilen pro Schreibvorgang bzw. Parquet-Row-Group
+DATASET_BATCH_ROWS = 500
+PROGRESS_DB = BASE_DIR / "progress.sqlite"
+# altes Format, wird beim ersten Start nach PROGRESS_DB migriert
 PROGRESS_FILE = BASE_DIR / "progress.json"
+# Sekunden, nach denen ein "running"-Eintrag als verwaist gilt
+CLAIM_STALE_AFTER = 3600
+# ein Unterverzeichnis pro Shard (generate-all --shard i/N), siehe sharding.py
+SHARDS_DIR = BASE_DIR / "shards"
 
-CASE_BIBLES_FILE = DATA_DIR / "case_bibles.json"
+# .json (Liste) oder .jsonl (ein Fall pro Zeile, z.B. aus "sample-cases")
+CASE_BIBLES_FILE = Path(os.environ.get("CASE_BIBLES_FILE", DATA_DIR / "case_bibles.json"))
+SAMPLED_CASES_FILE = DATA_DIR / "case_bibles_sampled.jsonl"
 
 DEFAULT_MODEL = "gpt-5-mini"
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 
 MAX_TOKENS = 8000
+# Antworten streamen; beim Wortmaximum der Vorlage mal STREAM_WORD_HEADROOM
+# wird der Stream geschlossen (Token-Verbrauch dann geschätzt)
+STREAMING = True
+STREAM_WORD_HEADROOM = 1.1
+# Anteil der Abschnitte aus "struktur", der im Dokument erkennbar sein muss
+STRUCTURE_MIN_COVERAGE = 0.5
+
+# Prompt-Aufbau: "prefix" = System-Prompt der Fallsprache + Case-Bible als
+# erste User-Nachricht (pro Fall identisch, nutzt das Prompt-Caching des
+# Providers), danach die Dokument-Anweisungen; "legacy" = eine User-Nachricht
+PROMPT_LAYOUT = "prefix"
+# Token-Verbrauch und Laufzeit pro API-Aufruf (inkl. Prompt-Cache-Treffer)
+USAGE_LOG_FILE = BASE_DIR / "usage.jsonl"
+# Zeitfenster (Sekunden) fuer Dokumente/Minute und Restzeit in "status"
+METRICS_WINDOW = 600
 TEMPERATURE = 0.7
-DELAY_BETWEEN_CALLS = 0.5
+# Versuche pro Dokument (429 und Netzwerkfehler eingeschlossen)
+MAX_ATTEMPTS = 6
+# gleichzeitige API-Anfragen bei generate-all/generate-case (1 = sequenziell);
+# bei --concurrency N ist N das Maximum, bei 429 wird automatisch reduziert
+CONCURRENCY = 1
+
+# Limits des OpenAI-Kontos (siehe platform.openai.com/settings/organization/limits)
+RATE_LIMIT_RPM = 500
+RATE_LIMIT_TPM = 500_000
+# Anteil der Limits, der genutzt wird
+RATE_LIMIT_HEADROOM = 0.9
+# Pause bei 429 ohne Retry-After-Header (Sekunden)
+RATE_LIMIT_DEFAULT_PAUSE = 10
+
+# Cache fuer Modellantworten (Schluessel: Hash von Modell, Prompts und Parametern)
+COMPLETION_CACHE_FILE = BASE_DIR / "completion_cache.sqlite"
+COMPLETION_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Batch-API (generate-all --batch)
+BATCH_DIR = BASE_DIR / "batches"
+BATCH_STATE_FILE = BATCH_DIR / "jobs.json"
+BATCH_POLL_INTERVAL = 30
+# Limits pro Batch-Job laut OpenAI: 50'000 Anfragen, 200 MB Eingabedatei
+BATCH_MAX_REQUESTS = 50_000
+BATCH_MAX_BYTES = 190 * 1024 * 1024
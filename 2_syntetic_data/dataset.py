@@ -0,0 +1,261 @@
+"""Consolidated dataset of the generated documents (JSONL or Parquet).
+
+output/<case_id>/*.json stays the source of truth (resume, indexers). With
+`--dataset jsonl|parquet` every saved document is additionally appended
+to a dataset under config.DATASET_DIR/<format>/, one row per document
+with the metadata as columns:
+
+    doc_id, case_id, doc_index, typ, datum, sprache, case_cluster,
+    case_branche, case_status, kanton, normen, forderung_brutto,
+    model_used, content
+
+The dataset is split into part files of at most `part_rows` rows. Part
+names carry a timestamp and the process id, so several processes and
+shards can write into the same directory (or be merged by copying).
+Parquet needs pyarrow (optional: `uv sync --extra parquet`); a part file
+is written in row groups of `batch_rows` under a temporary dot-name and
+renamed once it is closed, so a crashed process leaves no unreadable
+part. JSONL lines are readable right away (a torn last line is skipped).
+`export-dataset` rebuilds a dataset from output/ at any time, e.g. after
+a crash or to consolidate many small parts.
+
+A document generated twice (e.g. after resetting the progress) appears
+twice in the part files; `read_dataset` yields only the last row per
+doc_id (parts in name order, i.e. by creation time).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import config
+
+FORMATS = ["jsonl", "parquet"]
+COLUMNS = [
+    "doc_id", "case_id", "doc_index", "typ", "datum", "sprache", "case_cluster",
+    "case_branche", "case_status", "kanton", "normen", "forderung_brutto",
+    "model_used", "content",
+]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Fuer Parquet wird pyarrow benoetigt: uv sync --extra parquet") from e
+    return pyarrow, pyarrow.parquet
+
+
+def _parquet_schema(pa):
+    types = {
+        "doc_index": pa.int32(),
+        "normen": pa.list_(pa.string()),
+        "forderung_brutto": pa.float64(),
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in COLUMNS])
+
+
+def make_row(metadata: dict, doc_index: int, content: str) -> dict:
+    """Dataset row from the metadata written by save_document."""
+    row = {c: metadata.get(c) for c in COLUMNS}
+    row["doc_index"] = doc_index
+    row["content"] = content
+    return row
+
+
+def _tmp_name(part: Path) -> Path:
+    return part.with_name(f".{part.name}.tmp")
+
+
+class DatasetWriter:
+    """Appends rows to rotating part files of one format."""
+
+    def __init__(
+        self,
+        fmt: str,
+        directory: str | Path | None = None,
+        part_rows: int = config.DATASET_PART_ROWS,
+        batch_rows: int = config.DATASET_BATCH_ROWS,
+    ):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unbekanntes Format: {fmt} (erlaubt: {', '.join(FORMATS)})")
+        if fmt == "parquet":
+            self._pa, self._pq = _require_pyarrow()
+            self._schema = _parquet_schema(self._pa)
+        self.fmt = fmt
+        self.path = Path(directory or config.DATASET_DIR) / fmt
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.part_rows = part_rows
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._prefix = f"part-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._parts = 0
+        self._part_rows = 0
+        self._file = None
+        self._part: Path | None = None
+        self._buffer: list[dict] = []
+
+    def write(self, row: dict) -> None:
+        self._buffer.append(row)
+        self.rows += 1
+        if len(self._buffer) >= self.batch_rows:
+            self.flush()
+
+    def write_many(self, rows: Iterable[dict]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def _open_part(self):
+        self._part = self.path / f"{self._prefix}-{self._parts:05d}.{self.fmt}"
+        self._parts += 1
+        self._part_rows = 0
+        if self.fmt == "parquet":
+            return self._pq.ParquetWriter(_tmp_name(self._part), self._schema, compression="zstd")
+        return open(self._part, "a", encoding="utf-8")
+
+    def _close_part(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if self.fmt == "parquet":
+                # erst mit Footer unter dem endgueltigen Namen sichtbar
+                os.replace(_tmp_name(self._part), self._part)
+
+    def flush(self) -> None:
+        while self._buffer:
+            if self._file is None:
+                self._file = self._open_part()
+            take = min(len(self._buffer), self.part_rows - self._part_rows)
+            rows, self._buffer = self._buffer[:take], self._buffer[take:]
+            if self.fmt == "parquet":
+                table = self._pa.Table.from_pylist(rows, schema=self._schema)
+                self._file.write_table(table, row_group_size=self.batch_rows)
+            else:
+                self._file.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in rows)
+                self._file.flush()
+            self._part_rows += take
+            if self._part_rows >= self.part_rows:
+                self._close_part()
+
+    def close(self) -> None:
+        self.flush()
+        self._close_part()
+
+    def __enter__(self) -> "DatasetWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def iter_output_rows(output_dir: str | Path | None = None) -> Iterator[dict]:
+    """Dataset rows of all documents under output/, case by case."""
+    output_dir = Path(output_dir or config.OUTPUT_DIR)
+    for case_dir in sorted(p for p in output_dir.iterdir() if p.is_dir()):
+        docs = []
+        for doc_path in case_dir.glob("*_*.json"):
+            # "01_..." bis "100_...": Nummer vor dem ersten "_"; case_bible.json hat keine
+            prefix = doc_path.name.split("_", 1)[0]
+            if prefix.isdigit():
+                docs.append((int(prefix), doc_path))
+        for number, doc_path in sorted(docs):
+            with open(doc_path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+            yield make_row(doc["metadata"], number - 1, doc["content"])
+
+
+def read_dataset(
+    fmt: str,
+    directory: str | Path | None = None,
+    columns: list[str] | None = None,
+    filters: dict | None = None,
+) -> Iterator[dict]:
+    """Rows of a dataset, optionally only some columns and rows.
+
+    Only the last row per doc_id is yielded: a first pass reads just the
+    doc_id column, the second yields the winning rows. `filters` is
+    {column: value} (equality) and applies after that, so a document
+    whose latest row does not match is left out entirely. For Parquet,
+    columns and filters are pushed down to the reader (row groups whose
+    statistics rule out a match, or that hold no latest row, are skipped).
+    """
+    path = Path(directory or config.DATASET_DIR) / fmt
+    filters = filters or {}
+    if fmt == "parquet":
+        yield from _read_parquet(path, columns, filters)
+        return
+    parts = sorted(path.glob("part-*.jsonl"))
+    last = _last_positions(
+        (n, (row["doc_id"] for row in _jsonl_rows(part))) for n, part in enumerate(parts)
+    )
+    for n, part in enumerate(parts):
+        for i, row in enumerate(_jsonl_rows(part)):
+            if last[row["doc_id"]] != (n, i):
+                continue
+            if any(row.get(k) != v for k, v in filters.items()):
+                continue
+            yield {c: row.get(c) for c in columns} if columns else row
+
+
+def _last_positions(parts: Iterable[tuple[int, Iterable[str]]]) -> dict[str, tuple[int, int]]:
+    """doc_id -> (part number, row in part) of its last row."""
+    last = {}
+    for n, doc_ids in parts:
+        for i, doc_id in enumerate(doc_ids):
+            last[doc_id] = (n, i)
+    return last
+
+
+def _jsonl_rows(part: Path) -> Iterator[dict]:
+    with open(part, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # letzte Zeile eines abgebrochenen Laufs
+                continue
+
+
+def _read_parquet(path: Path, columns: list[str] | None, filters: dict) -> Iterator[dict]:
+    _, pq = _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    expr = None
+    for column, value in filters.items():
+        cond = ds.field(column) == value
+        expr = cond if expr is None else expr & cond
+    parts = sorted(path.glob("part-*.parquet"))
+    last = _last_positions(
+        (n, pq.read_table(part, columns=["doc_id"]).column("doc_id").to_pylist())
+        for n, part in enumerate(parts)
+    )
+    latest: dict[int, set[int]] = {}
+    for n, i in last.values():
+        latest.setdefault(n, set()).add(i)
+    read_columns = list(dict.fromkeys([*columns, "doc_id", *filters])) if columns else None
+    for n, part in enumerate(parts):
+        rows = latest.get(n)
+        if not rows:
+            continue
+        # erste Zeile jeder Row Group im Part
+        meta = pq.ParquetFile(part).metadata
+        starts = [0]
+        for g in range(meta.num_row_groups - 1):
+            starts.append(starts[-1] + meta.row_group(g).num_rows)
+        fragment = next(ds.dataset(part, format="parquet").get_fragments())
+        for group in fragment.split_by_row_group(expr):
+            g = group.row_groups[0].id
+            start, end = starts[g], starts[g] + group.row_groups[0].num_rows
+            keep = [i - start for i in range(start, end) if i in rows]
+            if not keep:
+                continue
+            table = group.to_table(columns=read_columns).take(keep)
+            if expr is not None:
+                table = table.filter(expr)
+            for row in table.to_pylist():
+                yield {c: row[c] for c in columns} if columns else row
@@ -0,0 +1,204 @@
+"""Cheap local checks for generated documents, run before a document is saved.
+
+- word budget: `WordCounter` counts words while tokens stream in, so the
+  generator can stop the stream a little past the template's `woerter`
+  maximum; `trim_to_paragraph` then cuts back to whole paragraphs within
+  the maximum, keeping the section headings.
+- language: stopword counts for DE/FR; a document clearly written in the
+  other language is rejected.
+- structure: the template's `struktur` items must show up in the text.
+  German documents are matched by word stems of the item names; for
+  French documents, whose headings are usually translated, the number of
+  heading-like lines is checked instead.
+
+A failed check raises ValueError, so the retry logic of the generator
+treats it like an empty answer.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass
+
+import config
+
+STOPWORDS = {
+    "DE": {
+        "der", "die", "das", "und", "ist", "nicht", "mit", "von", "zu", "den", "im",
+        "für", "auf", "des", "dem", "ein", "eine", "wird", "sich", "wir", "sie", "bei",
+    },
+    "FR": {
+        "le", "la", "les", "et", "est", "pas", "avec", "de", "du", "des", "un", "une",
+        "pour", "dans", "que", "qui", "sur", "au", "aux", "nous", "vous", "par",
+    },
+}
+# Mindestanzahl Stoppwoerter, ab der die Spracherkennung entscheidet
+MIN_STOPWORDS = 20
+
+_WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+# Absatz endet mit einem Satzzeichen (sonst wurde der Stream mitten im Satz geschlossen)
+_CLOSED_RE = re.compile(r"[.!?:;)\"»”]\s*$")
+_HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S|\*\*[^*]+\*\*\s*:?\s*$|\d+(\.\d+)*[.)]?\s+\S|[A-ZÄÖÜÉÈ][^.!?]{0,80}:\s*$)")
+
+
+@dataclass
+class DocumentSpec:
+    """What a document of one type has to satisfy (from its template)."""
+
+    typ: str
+    sprache: str
+    min_words: int
+    max_words: int
+    struktur: list[str]
+
+    @classmethod
+    def from_template(cls, typ: str, template: dict, sprache: str) -> "DocumentSpec":
+        min_w, max_w = template["woerter"]
+        return cls(
+            typ=typ,
+            sprache=sprache,
+            min_words=min_w,
+            max_words=max_w,
+            struktur=list(template["struktur"]),
+        )
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+class WordCounter:
+    """Incremental word count of a growing text (only complete words are counted)."""
+
+    def __init__(self):
+        self.words = 0
+        self._counted_upto = 0
+
+    def update(self, text: str) -> int:
+        """Count the words of `text` up to its last whitespace; `text` only ever grows."""
+        end = max(text.rfind(" "), text.rfind("\n"))
+        if end > self._counted_upto:
+            self.words += len(text[self._counted_upto:end].split())
+            self._counted_upto = end
+        return self.words
+
+
+def _is_heading(paragraph: str) -> bool:
+    lines = paragraph.strip().splitlines()
+    return len(lines) == 1 and bool(_HEADING_RE.match(lines[0]))
+
+
+def _prefix_paragraphs(paragraphs: list[str], max_words: int) -> list[str]:
+    kept, words = [], 0
+    for paragraph in paragraphs:
+        n = count_words(paragraph)
+        if words + n > max_words:
+            break
+        kept.append(paragraph)
+        words += n
+    # keine Ueberschrift ohne den zugehoerigen Abschnitt stehen lassen
+    while kept and _is_heading(kept[-1]):
+        kept.pop()
+    return kept
+
+
+def trim_to_paragraph(text: str, max_words: int) -> str:
+    """Cut `text` to at most `max_words` words at paragraph boundaries.
+
+    Headings are kept so the structure check still finds them: the last
+    body paragraph of the longest section is dropped until the text fits,
+    as long as every section keeps its first one. A last paragraph without
+    closing punctuation (stream closed mid-sentence) is dropped first. If
+    the text is still too long, the longest prefix of whole paragraphs is
+    kept; if even the first paragraph is too long, it is cut after the last
+    full sentence within the budget.
+    """
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if paragraphs and not _is_heading(paragraphs[-1]) and not _CLOSED_RE.search(paragraphs[-1]):
+        paragraphs.pop()
+    # Abschnitte: Ueberschrift (falls vorhanden) und ihre Absaetze
+    sections: list[list[str]] = []
+    for paragraph in paragraphs:
+        if _is_heading(paragraph) or not sections:
+            sections.append([paragraph])
+        else:
+            sections[-1].append(paragraph)
+    sections = [sec for sec in sections if not (len(sec) == 1 and _is_heading(sec[0]))]
+
+    def body_start(sec: list[str]) -> int:
+        return 1 if _is_heading(sec[0]) else 0
+
+    words = sum(count_words(p) for sec in sections for p in sec)
+    while words > max_words:
+        shrinkable = [sec for sec in sections if len(sec) > body_start(sec) + 1]
+        if not shrinkable:
+            break
+        longest = max(shrinkable, key=lambda sec: sum(count_words(p) for p in sec))
+        words -= count_words(longest.pop())
+    paragraphs = [p for sec in sections for p in sec]
+    kept = paragraphs if words <= max_words else _prefix_paragraphs(paragraphs, max_words)
+    if kept:
+        return "\n\n".join(kept).rstrip()
+    cut = re.match(r"\s*(?:\S+\s*){0,%d}" % max_words, text).group().rstrip()
+    last_stop = cut.rfind(".")
+    return cut[: last_stop + 1] if last_stop > 0 else cut
+
+
+def detect_language(text: str) -> str | None:
+    """'DE' or 'FR' by stopword counts; None if the text is too short to tell."""
+    counts = {lang: 0 for lang in STOPWORDS}
+    for word in _WORD_RE.findall(text.lower()):
+        for lang, words in STOPWORDS.items():
+            if word in words:
+                counts[lang] += 1
+    if sum(counts.values()) < MIN_STOPWORDS:
+        return None
+    best = max(counts, key=counts.get)
+    others = max(v for lang, v in counts.items() if lang != best)
+    # deutliche Mehrheit verlangen; gemischte Texte (Zitate, Namen) nicht verwerfen
+    return best if counts[best] >= 2 * others else None
+
+
+def _stems(item: str) -> list[str]:
+    return [w[:6].lower() for w in _WORD_RE.findall(item) if len(w) >= 5]
+
+
+def missing_sections(text: str, spec: DocumentSpec) -> list[str]:
+    """Template structure items not found in the text (empty list = ok)."""
+    if spec.sprache == "DE":
+        lowered = text.lower()
+        return [
+            item for item in spec.struktur
+            if (stems := _stems(item)) and not any(stem in lowered for stem in stems)
+        ]
+    # FR: Überschriften werden übersetzt, also nur ihre Anzahl prüfen
+    headings = sum(1 for line in text.splitlines() if _HEADING_RE.match(line))
+    required = math.ceil(len(spec.struktur) * config.STRUCTURE_MIN_COVERAGE)
+    return [] if headings >= required else spec.struktur[headings:]
+
+
+def finalize_document(text: str, spec: DocumentSpec | None) -> str:
+    """Trim to the word budget, then run all checks; returns the text to save.
+
+    The checks see exactly the text that is saved.
+    """
+    if not text or not text.strip():
+        raise ValueError("Leere Antwort vom Modell erhalten, versuche erneut")
+    if spec is None:
+        return text
+    if count_words(text) > spec.max_words:
+        text = trim_to_paragraph(text, spec.max_words)
+    check_document(text, spec)
+    return text
+
+
+def check_document(text: str, spec: DocumentSpec) -> None:
+    """Raise ValueError if the document fails the language or structure check."""
+    detected = detect_language(text)
+    if detected is not None and detected != spec.sprache:
+        raise ValueError(f"Falsche Sprache: {detected} statt {spec.sprache}")
+    missing = missing_sections(text, spec)
+    allowed = len(spec.struktur) - math.ceil(len(spec.struktur) * config.STRUCTURE_MIN_COVERAGE)
+    if len(missing) > allowed:
+        raise ValueError(f"Fehlende Abschnitte: {', '.join(missing)}")
@@ -1,39 +1,358 @@
 from __future__ import annotations
 
+import threading
 import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+from tenacity import AsyncRetrying, Retrying, stop_after_attempt, wait_exponential
 
 import config
+import usage_log
+from completion_cache import CacheMiss, CompletionCache
+from doc_checks import DocumentSpec, WordCounter, finalize_document
+from rate_limit import AdaptiveConcurrency, RateLimiter, estimate_request_tokens, estimate_tokens
 
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_limiter: RateLimiter | None = None
+_cache: CompletionCache | None = None
+_cache_only = False
+_lock = threading.Lock()
 
-def _get_client() -> OpenAI:
-    return OpenAI(api_key=config.OPENAI_API_KEY)
+
+def get_client() -> OpenAI:
+    """Shared client: every call reuses its keep-alive connection pool.
+
+    SDK-internal retries are off; retries (and Retry-After) are handled
+    below, so the rate limiter sees every attempt.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            _client = OpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """Shared async client: all concurrent calls reuse one connection pool."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY, max_retries=0)
+    return _async_client
+
+
+def get_limiter() -> RateLimiter:
+    """Process-wide RPM/TPM limiter shared by the sync and async paths."""
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+    return _limiter
+
+
+def get_cache() -> CompletionCache:
+    """Process-wide completion cache (see completion_cache.py)."""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = CompletionCache()
+    return _cache
+
+
+def set_cache_only(enabled: bool) -> None:
+    """Replay mode: answer from the cache only, never call the API."""
+    global _cache_only
+    _cache_only = enabled
+
+
+def cached_completion(request: dict) -> str | None:
+    """Cached answer to `request`; raises CacheMiss on a miss in cache-only mode."""
+    content = get_cache().get(request)
+    if content is None and _cache_only:
+        raise CacheMiss("Nicht im Cache (--cache-only)")
+    return content
+
+
+def retry_after_seconds(exc: BaseException | None) -> float | None:
+    """Delay requested by the provider (retry-after-ms / retry-after header), if any."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if value := headers.get("retry-after-ms"):
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    if value := headers.get("retry-after"):
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+_backoff = wait_exponential(multiplier=2, min=2, max=8)
+
+
+def _wait(retry_state) -> float:
+    """Wait as long as the provider asks for, otherwise back off exponentially."""
+    delay = retry_after_seconds(retry_state.outcome.exception())
+    return delay if delay is not None else _backoff(retry_state)
+
+
+def _on_rate_limit(exc: RateLimitError) -> None:
+    get_limiter().pause(retry_after_seconds(exc) or config.RATE_LIMIT_DEFAULT_PAUSE)
+
+
+def chat_request(messages: list[dict], model: str) -> dict:
+    """Request body of a chat completion (shared by direct and batch calls)."""
+    return {
+        "model": model,
+        "messages": messages,
+        "max_completion_tokens": config.MAX_TOKENS,
+    }
+
+
+class _StreamedAnswer:
+    """Collects a streamed completion.
+
+    With a spec, `feed()` returns True once the text exceeds the template's
+    word maximum times STREAM_WORD_HEADROOM (`stopped_early`); the caller
+    then stops reading and closes the response, so an over-long answer
+    costs no further latency or tokens. The usage chunk comes last and is
+    lost in that case; `usage_dict()` estimates the tokens instead.
+    """
+
+    def __init__(self, spec: DocumentSpec | None):
+        self.spec = spec
+        self.content = ""
+        self.usage = None
+        self.stopped_early = False
+        self._counter = WordCounter()
+        self._word_limit = spec.max_words * config.STREAM_WORD_HEADROOM if spec else None
+
+    def feed(self, chunk) -> bool:
+        """Add one chunk; True if the word budget is used up and reading should stop."""
+        if chunk.usage is not None:
+            self.usage = chunk.usage
+        if not chunk.choices or not (delta := chunk.choices[0].delta.content):
+            return False
+        self.content += delta
+        if self._word_limit is not None and self._counter.update(self.content) > self._word_limit:
+            self.stopped_early = True
+        return self.stopped_early
+
+    def usage_dict(self, request: dict) -> dict | None:
+        """Reported usage, or an estimate if the stream was closed before the usage chunk.
+
+        The estimate has no cached or reasoning tokens, so it is a lower bound.
+        """
+        if self.usage is not None:
+            return self.usage.model_dump()
+        if not self.stopped_early:
+            return None
+        prompt = estimate_request_tokens(request) - request.get("max_completion_tokens", 0)
+        completion = estimate_tokens(self.content)
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+def _stream_args() -> dict:
+    return {"stream": True, "stream_options": {"include_usage": True}}
+
+
+def _retry_args() -> dict:
+    return {"stop": stop_after_attempt(config.MAX_ATTEMPTS), "wait": _wait, "reraise": True}
+
+
+def _settle_and_log(
+    request: dict,
+    doc_id: str | None,
+    spec: DocumentSpec | None,
+    reserved: int,
+    answer: _StreamedAnswer,
+    latency: float,
+    retries: int,
+    ok: bool,
+) -> None:
+    usage = answer.usage_dict(request)
+    get_limiter().settle(reserved, usage["total_tokens"] if usage else reserved)
+    extra = {}
+    if answer.stopped_early:
+        extra["stopped_early"] = True
+    if answer.usage is None and usage is not None:
+        extra["usage_estimated"] = True
+    entry = usage_log.usage_entry(
+        request["model"],
+        usage,
+        doc_id,
+        doc_type=spec.typ if spec else None,
+        latency_s=round(latency, 3),
+        retries=retries,
+        ok=ok,
+        **extra,
+    )
+    usage_log.record([entry])
+
+
+def _log_failed_call(
+    request: dict,
+    doc_id: str | None,
+    spec: DocumentSpec | None,
+    started: float,
+    retries: int,
+    exc: BaseException,
+) -> None:
+    """Log a call that raised (429, timeout, 5xx), so retries show up in the status."""
+    entry = usage_log.usage_entry(
+        request["model"],
+        None,
+        doc_id,
+        doc_type=spec.typ if spec else None,
+        latency_s=round(time.monotonic() - started, 3),
+        retries=retries,
+        ok=False,
+        error=type(exc).__name__,
+    )
+    usage_log.record([entry])
+
+
+def _finish(
+    request: dict,
+    doc_id: str | None,
+    spec: DocumentSpec | None,
+    reserved: int,
+    answer: _StreamedAnswer,
+    started: float,
+    retries: int,
+) -> str:
+    """Check the answer and log the call (rejected answers cost tokens too)."""
+    latency = time.monotonic() - started
+    try:
+        content = finalize_document(answer.content, spec)
+    except ValueError:
+        _settle_and_log(request, doc_id, spec, reserved, answer, latency, retries, ok=False)
+        raise
+    _settle_and_log(request, doc_id, spec, reserved, answer, latency, retries, ok=True)
+    return content
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=2, min=2, max=8),
-    reraise=True,
-)
 def generate_document(
-    system_prompt: str,
-    user_prompt: str,
+    messages: list[dict],
     model: str = config.DEFAULT_MODEL,
+    doc_id: str | None = None,
+    spec: DocumentSpec | None = None,
 ) -> str:
-    """Call OpenAI API to generate a single document."""
-    client = _get_client()
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ],
-        max_completion_tokens=config.MAX_TOKENS,
-    )
-    content = response.choices[0].message.content
-    if not content or not content.strip():
-        raise ValueError("Leere Antwort vom Modell erhalten, versuche erneut")
-    time.sleep(config.DELAY_BETWEEN_CALLS)
+    """Generate a single document (from the completion cache if the prompt is unchanged).
+
+    With a `spec`, the answer is cut to the template's word budget and
+    checked for language and structure (see doc_checks.py); a failed check
+    is retried like an empty answer. Only checked answers are cached.
+    """
+    request = chat_request(messages, model)
+    if (content := cached_completion(request)) is not None:
+        return content
+    for attempt in Retrying(**_retry_args()):
+        with attempt:
+            content = _complete(request, doc_id, spec, attempt.retry_state.attempt_number - 1)
+    get_cache().put(request, content)
+    return content
+
+
+def _complete(
+    request: dict,
+    doc_id: str | None,
+    spec: DocumentSpec | None = None,
+    retries: int = 0,
+) -> str:
+    """Call OpenAI API for one chat request (one attempt)."""
+    reserved = estimate_request_tokens(request)
+    limiter = get_limiter()
+    limiter.acquire(reserved)
+    answer = _StreamedAnswer(spec)
+    started = time.monotonic()
+    try:
+        if config.STREAMING:
+            with get_client().chat.completions.create(**request, **_stream_args()) as stream:
+                for chunk in stream:
+                    if answer.feed(chunk):
+                        break
+        else:
+            response = get_client().chat.completions.create(**request)
+            answer.content, answer.usage = response.choices[0].message.content or "", response.usage
+    except BaseException as e:
+        # no answer: refund the reserved tokens (the request slot stays used)
+        limiter.settle(reserved, 0)
+        if isinstance(e, Exception):
+            _log_failed_call(request, doc_id, spec, started, retries, e)
+        if isinstance(e, RateLimitError):
+            _on_rate_limit(e)
+        raise
+    return _finish(request, doc_id, spec, reserved, answer, started, retries)
+
+
+async def generate_document_async(
+    messages: list[dict],
+    model: str = config.DEFAULT_MODEL,
+    doc_id: str | None = None,
+    concurrency: AdaptiveConcurrency | None = None,
+    spec: DocumentSpec | None = None,
+) -> str:
+    """Async variant of generate_document for concurrent generation.
+
+    `concurrency` (optional) is told about successes and 429s so the
+    caller can adapt the number of in-flight calls.
+    """
+    request = chat_request(messages, model)
+    if (content := cached_completion(request)) is not None:
+        return content
+    async for attempt in AsyncRetrying(**_retry_args()):
+        with attempt:
+            content = await _complete_async(
+                request, doc_id, concurrency, spec, attempt.retry_state.attempt_number - 1
+            )
+    get_cache().put(request, content)
     return content
+
+
+async def _complete_async(
+    request: dict,
+    doc_id: str | None,
+    concurrency: AdaptiveConcurrency | None,
+    spec: DocumentSpec | None = None,
+    retries: int = 0,
+) -> str:
+    reserved = estimate_request_tokens(request)
+    limiter = get_limiter()
+    await limiter.acquire_async(reserved)
+    answer = _StreamedAnswer(spec)
+    client = get_async_client()
+    started = time.monotonic()
+    try:
+        if config.STREAMING:
+            async with await client.chat.completions.create(**request, **_stream_args()) as stream:
+                async for chunk in stream:
+                    if answer.feed(chunk):
+                        break
+        else:
+            response = await client.chat.completions.create(**request)
+            answer.content, answer.usage = response.choices[0].message.content or "", response.usage
+    except BaseException as e:
+        # no answer (also on cancellation): refund the reserved tokens
+        limiter.settle(reserved, 0)
+        if isinstance(e, Exception):
+            _log_failed_call(request, doc_id, spec, started, retries, e)
+        if isinstance(e, RateLimitError):
+            _on_rate_limit(e)
+            if concurrency is not None:
+                concurrency.on_throttle()
+        raise
+    if concurrency is not None:
+        concurrency.on_success()
+    return _finish(request, doc_id, spec, reserved, answer, started, retries)
@@ -1,24 +1,92 @@
 import sys
 
 import config
-from pipeline import run_all, run_single, show_status
+from dataset import FORMATS
+from generator import set_cache_only
+from pipeline import export_dataset, merge_shards, run_all, run_batch, run_single, show_status
+from sampler import sample_case_bibles, write_jsonl
+from sharding import Shard, activate
 
 
 def print_usage():
     print("Verwendung:")
-    print("  uv run python main.py generate-all [--model MODEL]")
-    print("  uv run python main.py generate-case CASE_ID [--model MODEL]")
-    print("  uv run python main.py status")
+    print("  uv run python main.py generate-all [--model MODEL] [--concurrency N | --batch] [--cache-only]"
+          " [--shard I/N] [--dataset jsonl|parquet]")
+    print("  uv run python main.py generate-case CASE_ID [--model MODEL] [--concurrency N] [--cache-only]"
+          " [--dataset jsonl|parquet]")
+    print("  uv run python main.py status [--shard I/N]")
+    print("  uv run python main.py merge-shards [SHARD_DIR ...]")
+    print("  uv run python main.py export-dataset jsonl|parquet [--out DIR]")
+    print("  uv run python main.py sample-cases N [--seed S] [--out PATH]")
     print()
     print(f"Default-Modell: {config.DEFAULT_MODEL}")
+    print(f"Default-Parallelitaet: {config.CONCURRENCY}")
+
+
+def parse_option(args: list[str], name: str, default: str | None = None) -> str | None:
+    """Value following `name` in args, or `default`."""
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            return args[i + 1]
+    return default
 
 
 def parse_model(args: list[str]) -> str:
     """Extract --model value from args, return default if not present."""
+    return parse_option(args, "--model", config.DEFAULT_MODEL)
+
+
+def parse_concurrency(args: list[str]) -> int:
+    """Extract --concurrency value from args, return default if not present."""
     for i, arg in enumerate(args):
-        if arg == "--model" and i + 1 < len(args):
-            return args[i + 1]
-    return config.DEFAULT_MODEL
+        if arg == "--concurrency" and i + 1 < len(args):
+            try:
+                value = int(args[i + 1])
+            except ValueError:
+                value = 0
+            if value < 1:
+                print(f"Fehler: --concurrency erwartet eine positive Zahl, nicht '{args[i + 1]}'.")
+                sys.exit(1)
+            return value
+    return config.CONCURRENCY
+
+
+def parse_dataset_format(args: list[str], option: str = "--dataset") -> str | None:
+    """Extract the dataset format (jsonl/parquet) from args, None if not present."""
+    fmt = parse_option(args, option)
+    if fmt is not None and fmt not in FORMATS:
+        print(f"Fehler: {option} erwartet {' oder '.join(FORMATS)}, nicht '{fmt}'.")
+        sys.exit(1)
+    return fmt
+
+
+def parse_shard(args: list[str]) -> Shard | None:
+    """Extract --shard I/N from args and redirect this process's files to the shard."""
+    spec = parse_option(args, "--shard")
+    if spec is None:
+        return None
+    try:
+        shard = Shard.parse(spec)
+    except ValueError:
+        print(f"Fehler: --shard erwartet I/N mit 1 <= I <= N, nicht '{spec}'.")
+        sys.exit(1)
+    activate(shard)
+    return shard
+
+
+def sample_cases(args: list[str]) -> None:
+    """Write N sampled case bibles as JSONL (see sampler.py)."""
+    try:
+        n = int(args[0])
+        seed = int(parse_option(args[1:], "--seed", "0"))
+    except (IndexError, ValueError):
+        print("Fehler: Anzahl Faelle (und --seed) muessen ganze Zahlen sein.")
+        print("Beispiel: uv run python main.py sample-cases 10000 --seed 1")
+        sys.exit(1)
+    out = parse_option(args[1:], "--out", str(config.SAMPLED_CASES_FILE))
+    count = write_jsonl(sample_case_bibles(n, seed=seed), out)
+    print(f"{count} Faelle nach {out} geschrieben")
+    print(f"Generieren mit: CASE_BIBLES_FILE={out} uv run python main.py generate-all")
 
 
 def main():
@@ -29,10 +97,17 @@ def main():
         sys.exit(1)
 
     command = args[0]
+    # Nur Antworten aus dem Completion-Cache verwenden, keine API-Aufrufe
+    set_cache_only("--cache-only" in args)
 
     if command == "generate-all":
         model = parse_model(args[1:])
-        run_all(model)
+        shard = parse_shard(args[1:])
+        dataset_format = parse_dataset_format(args[1:])
+        if "--batch" in args[1:]:
+            run_batch(model, shard, dataset_format)
+        else:
+            run_all(model, parse_concurrency(args[1:]), shard, dataset_format)
 
     elif command == "generate-case":
         if len(args) < 2:
@@ -41,10 +116,23 @@ def main():
             sys.exit(1)
         case_id = args[1]
         model = parse_model(args[2:])
-        run_single(case_id, model)
+        run_single(case_id, model, parse_concurrency(args[2:]), parse_dataset_format(args[2:]))
 
     elif command == "status":
-        show_status()
+        show_status(parse_shard(args[1:]))
+
+    elif command == "merge-shards":
+        merge_shards(args[1:])
+
+    elif command == "export-dataset":
+        if len(args) < 2 or args[1] not in FORMATS:
+            print(f"Fehler: Format fehlt ({' oder '.join(FORMATS)}).")
+            print("Beispiel: uv run python main.py export-dataset parquet")
+            sys.exit(1)
+        export_dataset(args[1], parse_option(args[2:], "--out"))
+
+    elif command == "sample-cases":
+        sample_cases(args[1:])
 
     else:
         print(f"Unbekannter Befehl: '{command}'")
@@ -1,174 +1,541 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+import batch
 import config
-from generator import generate_document
-from models import CaseBible, DocumentProgress
-from prompts import SYSTEM_PROMPTS, build_user_prompt, get_template
-
-
-def load_case_bibles() -> list[CaseBible]:
-    """Load all case bibles from the JSON file."""
-    with open(config.CASE_BIBLES_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return [CaseBible(**cb) for cb in data]
-
-
-def load_progress() -> dict[str, dict[int, str]]:
-    """Load progress from file. Returns {case_id: {doc_index: status}}."""
-    if config.PROGRESS_FILE.exists():
-        with open(config.PROGRESS_FILE, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-        # Convert string keys back to int
-        return {
-            case_id: {int(k): v for k, v in docs.items()}
-            for case_id, docs in raw.items()
-        }
-    return {}
+import usage_log
+from completion_cache import CacheMiss, request_key
+from dataset import DatasetWriter, iter_output_rows, make_row
+from doc_checks import DocumentSpec, finalize_document
+from generator import (
+    cached_completion,
+    chat_request,
+    generate_document,
+    generate_document_async,
+    get_cache,
+)
+from models import CaseBible, DocumentProgress, DokumentPlanEintrag
+from progress_store import COMPLETED, FAILED, PENDING, ProgressStore
+from prompts import (
+    SYSTEM_PROMPTS,
+    build_case_prefix,
+    build_document_prompt,
+    build_user_prompt,
+    get_template,
+)
+from rate_limit import AdaptiveConcurrency
+from sharding import Shard, merge_shard, shard_directories
+
+
+def iter_case_bibles(path: str | Path | None = None) -> Iterator[CaseBible]:
+    """Yield the case bibles of a case file one at a time.
+
+    `.jsonl` files are read line by line. A `.json` array is parsed
+    incrementally if ijson is installed (`uv sync --extra stream`),
+    otherwise it is loaded as a whole.
+    """
+    path = Path(path or config.CASE_BIBLES_FILE)
+    with open(path, "rb") as f:
+        if path.suffix == ".jsonl":
+            for line in f:
+                if line.strip():
+                    yield CaseBible.model_validate_json(line)
+        elif ijson is not None:
+            # use_float: Betraege als float statt Decimal
+            for cb in ijson.items(f, "item", use_float=True):
+                yield CaseBible(**cb)
+        else:
+            for cb in json.load(f):
+                yield CaseBible(**cb)
 
 
-def save_progress(progress: dict[str, dict[int, str]]) -> None:
-    """Save progress to file."""
-    with open(config.PROGRESS_FILE, "w", encoding="utf-8") as f:
-        json.dump(progress, f, indent=2, ensure_ascii=False)
+def load_case_bibles(path: str | Path | None = None) -> list[CaseBible]:
+    """Load all case bibles into memory (see iter_case_bibles for large files)."""
+    return list(iter_case_bibles(path))
 
 
-def generate_case(case_bible: CaseBible, model: str, progress: dict[str, dict[int, str]]) -> dict:
-    """Generate all documents for a single case. Returns stats."""
-    case_id = case_bible.case_id
-    case_dir = config.OUTPUT_DIR / case_id
+def prepare_case_dir(case_bible: CaseBible) -> Path:
+    """Create the output folder of a case and save its case bible there."""
+    case_dir = config.OUTPUT_DIR / case_bible.case_id
     case_dir.mkdir(parents=True, exist_ok=True)
 
-    # Save case bible to output
     case_bible_path = case_dir / "case_bible.json"
     with open(case_bible_path, "w", encoding="utf-8") as f:
         json.dump(case_bible.model_dump(), f, indent=2, ensure_ascii=False)
-
-    if case_id not in progress:
-        progress[case_id] = {}
+    return case_dir
+
+
+def make_doc_id(case_id: str, index: int, doc_entry: DokumentPlanEintrag) -> str:
+    return f"{case_id}_{index+1:02d}_{doc_entry.typ}"
+
+
+def build_messages(case_dict: dict, doc_entry: DokumentPlanEintrag) -> list[dict]:
+    """Chat messages for one document of a case (layout: config.PROMPT_LAYOUT).
+
+    "prefix": system prompt of the case language and the case bible as
+    first user message are identical for all documents of a case; only the
+    last message differs. "legacy": system prompt of the document language
+    and a single user message.
+    """
+    template = get_template(doc_entry.typ)
+    if config.PROMPT_LAYOUT == "prefix":
+        system_prompt = SYSTEM_PROMPTS.get(case_dict["sprache"], SYSTEM_PROMPTS["DE"])
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": build_case_prefix(case_dict)},
+            {"role": "user", "content": build_document_prompt(case_dict, doc_entry.model_dump(), template)},
+        ]
+    system_prompt = SYSTEM_PROMPTS.get(doc_entry.sprache, SYSTEM_PROMPTS["DE"])
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": build_user_prompt(case_dict, doc_entry.model_dump(), template)},
+    ]
+
+
+def save_document(
+    case_bible: CaseBible,
+    index: int,
+    doc_entry: DokumentPlanEintrag,
+    content: str,
+    model: str,
+    writer: DatasetWriter | None = None,
+) -> None:
+    """Write one generated document with its metadata to the case folder.
+
+    With a dataset `writer`, the document is also appended to the dataset.
+    """
+    case_id = case_bible.case_id
+    metadata = {
+        "case_id": case_id,
+        "doc_id": make_doc_id(case_id, index, doc_entry),
+        "typ": doc_entry.typ,
+        "datum": doc_entry.datum,
+        "sprache": doc_entry.sprache,
+        "case_cluster": case_bible.cluster,
+        "case_branche": case_bible.branche,
+        "case_status": case_bible.status,
+        "kanton": case_bible.kanton,
+        "normen": case_bible.recht.normen,
+        "forderung_brutto": case_bible.betraege.forderung_brutto,
+        "model_used": model,
+    }
+
+    doc_filename = f"{index+1:02d}_{doc_entry.datum}_{doc_entry.typ}.json"
+    doc_path = config.OUTPUT_DIR / case_id / doc_filename
+    with open(doc_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"content": content, "metadata": metadata},
+            f,
+            indent=2,
+            ensure_ascii=False,
+        )
+    if writer is not None:
+        writer.write(make_row(metadata, index, content))
+
+
+def document_spec(doc_entry: DokumentPlanEintrag) -> DocumentSpec:
+    """Word budget, language and structure a document has to meet before it is saved."""
+    return DocumentSpec.from_template(doc_entry.typ, get_template(doc_entry.typ), doc_entry.sprache)
+
+
+def generate_case(
+    case_bible: CaseBible,
+    model: str,
+    store: ProgressStore,
+    writer: DatasetWriter | None = None,
+) -> dict:
+    """Generate all documents for a single case. Returns stats."""
+    case_id = case_bible.case_id
+    prepare_case_dir(case_bible)
 
     stats = {"generated": 0, "skipped": 0, "failed": 0}
     case_dict = case_bible.model_dump()
 
     for i, doc_entry in enumerate(case_bible.dokument_plan):
-        doc_entry_dict = doc_entry.model_dump()
-
-        # Check if already completed
-        if progress[case_id].get(i) == "completed":
+        # Skip documents already completed or claimed by another process
+        if not store.claim(case_id, i):
             stats["skipped"] += 1
             continue
 
-        sprache = doc_entry.sprache
-        system_prompt = SYSTEM_PROMPTS.get(sprache, SYSTEM_PROMPTS["DE"])
-        template = get_template(doc_entry.typ)
-        user_prompt = build_user_prompt(case_dict, doc_entry_dict, template)
+        messages = build_messages(case_dict, doc_entry)
 
-        doc_id = f"{case_id}_{i+1:02d}_{doc_entry.typ}"
+        doc_id = make_doc_id(case_id, i, doc_entry)
         print(f"  [{i+1}/{len(case_bible.dokument_plan)}] {doc_id}...", end=" ", flush=True)
 
         try:
-            content = generate_document(system_prompt, user_prompt, model=model)
-
-            # Build metadata
-            metadata = {
-                "case_id": case_id,
-                "doc_id": doc_id,
-                "typ": doc_entry.typ,
-                "datum": doc_entry.datum,
-                "sprache": sprache,
-                "case_cluster": case_bible.cluster,
-                "case_branche": case_bible.branche,
-                "case_status": case_bible.status,
-                "kanton": case_bible.kanton,
-                "normen": case_bible.recht.normen,
-                "forderung_brutto": case_bible.betraege.forderung_brutto,
-                "model_used": model,
-            }
-
-            # Save document
-            doc_filename = f"{i+1:02d}_{doc_entry.datum}_{doc_entry.typ}.json"
-            doc_path = case_dir / doc_filename
-            with open(doc_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"content": content, "metadata": metadata},
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                )
+            content = generate_document(
+                messages, model=model, doc_id=doc_id, spec=document_spec(doc_entry)
+            )
+            save_document(case_bible, i, doc_entry, content, model, writer)
 
-            progress[case_id][i] = "completed"
-            save_progress(progress)
+            store.set_status(case_id, i, COMPLETED)
             stats["generated"] += 1
             print("OK")
 
+        except CacheMiss as e:
+            store.set_status(case_id, i, PENDING)
+            stats["skipped"] += 1
+            print(e)
+
         except Exception as e:
-            progress[case_id][i] = "failed"
-            save_progress(progress)
+            store.set_status(case_id, i, FAILED)
             stats["failed"] += 1
             print(f"FEHLER: {e}")
 
     return stats
 
 
-def run_all(model: str) -> None:
-    """Generate documents for all cases."""
-    case_bibles = load_case_bibles()
-    progress = load_progress()
+async def _generate_async(
+    case_bibles: Iterable[CaseBible],
+    model: str,
+    store: ProgressStore,
+    concurrency: int,
+    writer: DatasetWriter | None = None,
+) -> dict:
+    """Generate all pending documents of the given cases concurrently.
+
+    Documents only depend on their case bible, so they are independent of
+    each other. An adaptive limit (at most `concurrency`, halved on 429)
+    caps the number of in-flight API calls; new tasks are only created
+    once a slot is free, so memory stays flat even for very large corpora.
+    A document is claimed in the progress store only once its slot is
+    free, so claims never pile up ahead.
+    """
+    slots = AdaptiveConcurrency(concurrency)
+    stats = {"generated": 0, "skipped": 0, "failed": 0}
+
+    async def generate_one(cb: CaseBible, case_dict: dict, i: int, doc_entry: DokumentPlanEintrag) -> None:
+        doc_id = make_doc_id(cb.case_id, i, doc_entry)
+        messages = build_messages(case_dict, doc_entry)
+        try:
+            content = await generate_document_async(
+                messages,
+                model=model,
+                doc_id=doc_id,
+                concurrency=slots,
+                spec=document_spec(doc_entry),
+            )
+            save_document(cb, i, doc_entry, content, model, writer)
+            store.set_status(cb.case_id, i, COMPLETED)
+            stats["generated"] += 1
+            print(f"  {doc_id} OK")
+        except CacheMiss as e:
+            store.set_status(cb.case_id, i, PENDING)
+            stats["skipped"] += 1
+            print(f"  {doc_id} {e}")
+        except Exception as e:
+            store.set_status(cb.case_id, i, FAILED)
+            stats["failed"] += 1
+            print(f"  {doc_id} FEHLER: {e}")
+        finally:
+            await slots.release()
+
+    tasks = set()
+    for cb in case_bibles:
+        case_statuses = store.case_statuses(cb.case_id)
+        pending = [
+            (i, doc_entry)
+            for i, doc_entry in enumerate(cb.dokument_plan)
+            if case_statuses.get(i) != COMPLETED
+        ]
+        stats["skipped"] += len(cb.dokument_plan) - len(pending)
+        if not pending:
+            continue
+
+        prepare_case_dir(cb)
+        case_dict = cb.model_dump()
+        for i, doc_entry in pending:
+            await slots.acquire()
+            if not store.claim(cb.case_id, i):
+                await slots.release()
+                stats["skipped"] += 1
+                continue
+            task = asyncio.create_task(generate_one(cb, case_dict, i, doc_entry))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return stats
+
+
+def print_cache_stats() -> None:
+    stats = get_cache().stats()
+    if stats["hits"] or stats["misses"]:
+        print(f"Cache: {stats['hits']} Treffer, {stats['misses']} nicht im Cache "
+              f"({stats['entries']} Eintraege, {stats['bytes'] / 1024 / 1024:.1f} MB)")
+
+
+def iter_shard_cases(shard: Shard | None = None) -> Iterator[CaseBible]:
+    """Case bibles of the case file, only those of `shard` if given."""
+    for cb in iter_case_bibles():
+        if shard is None or shard.owns(cb.case_id):
+            yield cb
+
+
+def open_dataset(fmt: str | None) -> AbstractContextManager[DatasetWriter | None]:
+    """Dataset writer for `--dataset FORMAT`, or a no-op context without one."""
+    return DatasetWriter(fmt) if fmt else nullcontext()
+
+
+def run_all(
+    model: str,
+    concurrency: int = 1,
+    shard: Shard | None = None,
+    dataset_format: str | None = None,
+) -> None:
+    """Generate documents for all cases (of one shard, see sharding.py)."""
+    case_bibles = iter_shard_cases(shard)
 
-    print(f"Starte Generierung fuer {len(case_bibles)} Faelle mit Modell '{model}'")
+    print(f"Starte Generierung fuer {config.CASE_BIBLES_FILE.name} mit Modell '{model}'")
+    if shard is not None:
+        print(f"Shard {shard.index}/{shard.count}: {shard.directory}")
     print(f"Output-Verzeichnis: {config.OUTPUT_DIR}")
     print()
 
+    if concurrency > 1:
+        print(f"Parallel: bis zu {concurrency} gleichzeitige Anfragen")
+        with ProgressStore() as store, open_dataset(dataset_format) as writer:
+            total_stats = asyncio.run(
+                _generate_async(case_bibles, model, store, concurrency, writer)
+            )
+        print()
+        print("=" * 60)
+        print(f"Fertig! Generiert: {total_stats['generated']}, "
+              f"Uebersprungen: {total_stats['skipped']}, "
+              f"Fehlgeschlagen: {total_stats['failed']}")
+        print_cache_stats()
+        return
+
     total_stats = {"generated": 0, "skipped": 0, "failed": 0}
 
-    for cb in case_bibles:
-        total_docs = len(cb.dokument_plan)
-        completed = sum(1 for v in progress.get(cb.case_id, {}).values() if v == "completed")
-        if completed == total_docs:
-            print(f"[{cb.case_id}] Alle {total_docs} Dokumente bereits vorhanden, uebersprungen.")
-            total_stats["skipped"] += total_docs
-            continue
+    with ProgressStore() as store, open_dataset(dataset_format) as writer:
+        summary = store.summary()
+        for cb in case_bibles:
+            total_docs = len(cb.dokument_plan)
+            completed = summary.get(cb.case_id, {}).get(COMPLETED, 0)
+            if completed == total_docs:
+                print(f"[{cb.case_id}] Alle {total_docs} Dokumente bereits vorhanden, uebersprungen.")
+                total_stats["skipped"] += total_docs
+                continue
+
+            print(f"[{cb.case_id}] {cb.cluster} ({cb.sprache}, {cb.kanton}) – {total_docs} Dokumente")
+            stats = generate_case(cb, model, store, writer)
+            for k in total_stats:
+                total_stats[k] += stats[k]
+            print()
 
-        print(f"[{cb.case_id}] {cb.cluster} ({cb.sprache}, {cb.kanton}) – {total_docs} Dokumente")
-        stats = generate_case(cb, model, progress)
-        for k in total_stats:
-            total_stats[k] += stats[k]
-        print()
+    print("=" * 60)
+    print(f"Fertig! Generiert: {total_stats['generated']}, "
+          f"Uebersprungen: {total_stats['skipped']}, "
+          f"Fehlgeschlagen: {total_stats['failed']}")
+    print_cache_stats()
+
+
+def run_batch(
+    model: str,
+    shard: Shard | None = None,
+    dataset_format: str | None = None,
+) -> None:
+    """Generate all pending documents through the OpenAI Batch API.
+
+    Jobs still open from an earlier run are polled first; their documents
+    are not submitted again. Results are written the same way as in
+    generate_case; the progress store is updated in one transaction per
+    finished job.
+    """
+    case_bibles = list(iter_shard_cases(shard))
+    cases = {cb.case_id: cb for cb in case_bibles}
+    with ProgressStore() as store, open_dataset(dataset_format) as writer:
+        _run_batch(case_bibles, cases, model, store, writer)
+
+
+def _run_batch(
+    case_bibles: Iterable[CaseBible],
+    cases: dict[str, CaseBible],
+    model: str,
+    store: ProgressStore,
+    writer: DatasetWriter | None = None,
+) -> None:
+    completed = store.completed()
+    client = batch.get_client()
+
+    jobs = batch.load_jobs()
+    in_flight: set[str] = set()
+    for job in jobs:
+        in_flight |= batch.read_custom_ids(job["input_file"])
+    if jobs:
+        print(f"{len(jobs)} offene Batch-Jobs aus einem frueheren Lauf ({len(in_flight)} Dokumente)")
+
+    total_stats = {"generated": 0, "skipped": 0, "failed": 0}
+
+    def pending_requests():
+        """Requests to submit; unchanged prompts are answered from the cache right away."""
+        for cb in case_bibles:
+            case_dict = cb.model_dump()
+            for i, doc_entry in enumerate(cb.dokument_plan):
+                custom_id = batch.make_custom_id(cb.case_id, i)
+                if (cb.case_id, i) in completed:
+                    total_stats["skipped"] += 1
+                    continue
+                if custom_id in in_flight:
+                    continue
+                request = chat_request(build_messages(case_dict, doc_entry), model)
+                try:
+                    content = cached_completion(request)
+                except CacheMiss:
+                    total_stats["skipped"] += 1
+                    continue
+                if content is None:
+                    yield custom_id, request
+                    continue
+                prepare_case_dir(cb)
+                save_document(cb, i, doc_entry, content, model, writer)
+                store.set_status(cb.case_id, i, COMPLETED)
+                total_stats["generated"] += 1
+
+    prefix = time.strftime("batch_%Y%m%d_%H%M%S")
+    for input_file in batch.write_input_files(pending_requests(), prefix):
+        batch_id = batch.submit(client, input_file)
+        jobs.append({"id": batch_id, "input_file": str(input_file)})
+        batch.save_jobs(jobs)
+        print(f"Batch {batch_id} eingereicht: {input_file.name}")
+
+    print(f"Warte auf {len(jobs)} Batch-Jobs mit Modell '{model}'")
+    print(f"Output-Verzeichnis: {config.OUTPUT_DIR}")
+    print()
+
+    prepared: set[str] = set()
+    for job in batch.wait_for_jobs(client, [j["id"] for j in jobs]):
+        print(f"Batch {job.id}: {job.status}")
+        entry = next(j for j in jobs if j["id"] == job.id)
+        submitted = {
+            custom_id: (request_key(body), body["model"])
+            for custom_id, body in batch.iter_requests(entry["input_file"])
+        }
+        answered = set()
+        updates: list[tuple[str, int, str]] = []
+        usage_entries: list[dict] = []
+        for custom_id, content, error, usage in batch.iter_results(client, job):
+            case_id, i = batch.parse_custom_id(custom_id)
+            answered.add(custom_id)
+            cb = cases.get(case_id)
+            if cb is None:
+                continue
+            doc_entry = cb.dokument_plan[i]
+            doc_id = make_doc_id(case_id, i, doc_entry)
+            if error is None:
+                # Batch-Antworten lassen sich nicht abbrechen: nachtraeglich kuerzen und pruefen
+                try:
+                    content = finalize_document(content, document_spec(doc_entry))
+                except ValueError as e:
+                    error = str(e)
+            if usage is not None:
+                usage_entries.append(
+                    usage_log.usage_entry(
+                        submitted[custom_id][1],
+                        usage,
+                        doc_id,
+                        source="batch",
+                        doc_type=doc_entry.typ,
+                        retries=0,
+                        ok=error is None,
+                    )
+                )
+            if error is None:
+                if case_id not in prepared:
+                    prepare_case_dir(cb)
+                    prepared.add(case_id)
+                key, job_model = submitted[custom_id]
+                get_cache().put_key(key, job_model, content)
+                save_document(cb, i, doc_entry, content, job_model, writer)
+                updates.append((case_id, i, COMPLETED))
+                total_stats["generated"] += 1
+            else:
+                updates.append((case_id, i, FAILED))
+                total_stats["failed"] += 1
+                print(f"  {doc_id} FEHLER: {error}")
+
+        # Abgelaufene oder abgebrochene Jobs liefern nicht jede Anfrage zurueck
+        for custom_id in submitted.keys() - answered:
+            case_id, i = batch.parse_custom_id(custom_id)
+            if case_id in cases:
+                updates.append((case_id, i, FAILED))
+                total_stats["failed"] += 1
+
+        store.set_many(updates)
+        usage_log.record(usage_entries)
+        jobs.remove(entry)
+        batch.save_jobs(jobs)
 
+    print()
     print("=" * 60)
     print(f"Fertig! Generiert: {total_stats['generated']}, "
           f"Uebersprungen: {total_stats['skipped']}, "
           f"Fehlgeschlagen: {total_stats['failed']}")
+    print_cache_stats()
 
 
-def run_single(case_id: str, model: str) -> None:
+def run_single(
+    case_id: str,
+    model: str,
+    concurrency: int = 1,
+    dataset_format: str | None = None,
+) -> None:
     """Generate documents for a single case."""
-    case_bibles = load_case_bibles()
-    progress = load_progress()
-
-    cb = next((c for c in case_bibles if c.case_id == case_id), None)
+    cb = next((c for c in iter_case_bibles() if c.case_id == case_id), None)
     if cb is None:
-        available = ", ".join(c.case_id for c in case_bibles)
-        print(f"Fall '{case_id}' nicht gefunden. Verfuegbar: {available}")
+        available = [c.case_id for _, c in zip(range(20), iter_case_bibles())]
+        more = ", ..." if len(available) == 20 else ""
+        print(f"Fall '{case_id}' nicht gefunden. Verfuegbar: {', '.join(available)}{more}")
         return
 
     print(f"[{cb.case_id}] {cb.cluster} ({cb.sprache}, {cb.kanton})")
     print(f"Modell: {model}")
     print()
 
-    stats = generate_case(cb, model, progress)
+    with ProgressStore() as store, open_dataset(dataset_format) as writer:
+        if concurrency > 1:
+            stats = asyncio.run(_generate_async([cb], model, store, concurrency, writer))
+        else:
+            stats = generate_case(cb, model, store, writer)
     print()
     print(f"Fertig! Generiert: {stats['generated']}, "
           f"Uebersprungen: {stats['skipped']}, "
           f"Fehlgeschlagen: {stats['failed']}")
+    print_cache_stats()
+
+
+def _fmt(n: int) -> str:
+    """1234567 -> 1'234'567 (Schweizer Tausendertrennzeichen)."""
+    return f"{n:,}".replace(",", "'")
+
 
+def _fmt_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    minutes = round(seconds / 60)
+    if minutes < 60:
+        return f"{minutes} min"
+    return f"{minutes // 60} h {minutes % 60:02d} min"
 
-def show_status() -> None:
+
+def show_status(shard: Shard | None = None) -> None:
     """Show generation progress."""
-    case_bibles = load_case_bibles()
-    progress = load_progress()
+    case_bibles = iter_shard_cases(shard)
+    with ProgressStore() as store:
+        summary = store.summary()
 
     print(f"{'Fall':<6} {'Cluster':<50} {'Status':<20}")
     print("-" * 76)
@@ -179,9 +546,9 @@ def show_status() -> None:
 
     for cb in case_bibles:
         n_docs = len(cb.dokument_plan)
-        case_progress = progress.get(cb.case_id, {})
-        n_completed = sum(1 for v in case_progress.values() if v == "completed")
-        n_failed = sum(1 for v in case_progress.values() if v == "failed")
+        case_summary = summary.get(cb.case_id, {})
+        n_completed = case_summary.get(COMPLETED, 0)
+        n_failed = case_summary.get(FAILED, 0)
 
         total_docs += n_docs
         total_completed += n_completed
@@ -204,3 +571,67 @@ def show_status() -> None:
     if total_failed > 0:
         print(f", {total_failed} fehlgeschlagen", end="")
     print()
+
+    usage = usage_log.summarize()
+    if not usage["calls"]:
+        return
+    reported = usage["reported_prompt_tokens"]
+    share = usage["cached_tokens"] / reported if reported else 0
+    retries = f"{_fmt(usage['retries'])} Wiederholungen"
+    if usage["rate_limited"]:
+        retries += f", {_fmt(usage['rate_limited'])}x Rate-Limit"
+    print(f"Token: {_fmt(usage['prompt_tokens'])} Prompt (davon {_fmt(usage['cached_tokens'])} "
+          f"aus dem Prompt-Cache, {share:.0%}), {_fmt(usage['completion_tokens'])} Completion "
+          f"in {_fmt(usage['calls'])} Aufrufen ({retries})")
+    if usage["estimated"]:
+        print(f"  davon {_fmt(usage['estimated'])} Aufrufe geschaetzt (Stream beim Wortbudget geschlossen)")
+    if usage["latency_p50"] is not None:
+        print(f"Latenz: p50 {usage['latency_p50']:.1f}s, p95 {usage['latency_p95']:.1f}s")
+    rate = usage["docs_per_min"]
+    if rate:
+        remaining = total_docs - total_completed
+        print(f"Durchsatz: {rate:.1f} Dokumente/min", end="")
+        if remaining > 0:
+            print(f", Restzeit ca. {_fmt_duration(remaining / rate * 60)} "
+                  f"fuer {remaining} Dokumente", end="")
+        print()
+
+    print()
+    print(f"{'Dokumenttyp':<45} {'Dok.':>5} {'Prompt/Dok.':>12} {'Compl./Dok.':>12}")
+    print("-" * 76)
+    for doc_type, t in sorted(usage["by_type"].items(), key=lambda kv: -kv[1]["completion_tokens"]):
+        docs = t["docs"]
+        # ohne akzeptiertes Dokument gibt es keinen Durchschnitt
+        prompt = _fmt(t["prompt_tokens"] // docs) if docs else "-"
+        completion = _fmt(t["completion_tokens"] // docs) if docs else "-"
+        print(f"{doc_type[:45]:<45} {docs:>5} {prompt:>12} {completion:>12}")
+
+
+def merge_shards(shard_dirs: list[str] | None = None) -> None:
+    """Merge shard directories (default: all under shards/) into the main output and state files."""
+    dirs = [Path(d) for d in shard_dirs] if shard_dirs else shard_directories()
+    if not dirs:
+        print(f"Keine Shards gefunden in {config.SHARDS_DIR}")
+        return
+    config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    with ProgressStore() as store:
+        for shard_dir in dirs:
+            stats = merge_shard(shard_dir, store, get_cache())
+            print(f"{shard_dir.name}: {stats['files']} Dateien, "
+                  f"{stats['progress_rows']} Fortschritts-Eintraege, "
+                  f"{stats['cache_entries']} Cache-Eintraege, "
+                  f"{stats['usage_lines']} Usage-Zeilen uebernommen")
+
+
+def export_dataset(fmt: str, directory: str | None = None) -> None:
+    """Rebuild the dataset of one format from all documents under output/.
+
+    Existing part files of that format are replaced; do not run this while
+    a generation run is writing into the same dataset.
+    """
+    with DatasetWriter(fmt, directory) as writer:
+        # auch halbe Parts abgebrochener Laeufe (.part-*.tmp)
+        for old in [*writer.path.glob(f"part-*.{fmt}"), *writer.path.glob(".part-*.tmp")]:
+            old.unlink()
+        writer.write_many(iter_output_rows())
+    print(f"{writer.rows} Dokumente nach {writer.path} exportiert")
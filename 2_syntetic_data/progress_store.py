@@ -0,0 +1,215 @@
+"""SQLite progress store: one row per (case_id, doc_index).
+
+Replaces the old progress.json, which was rewritten as a whole after every
+document. A status change is now a single-row UPSERT. The database runs in
+WAL mode with a busy timeout, so several processes (e.g. shards or a
+parallel `status` call) can read and write it at the same time.
+
+Statuses: pending / running / completed / failed. `claim()` moves a
+document to "running" in one atomic UPDATE; only one worker gets it. A
+claim older than `stale_after` seconds counts as abandoned (crashed run)
+and can be claimed again.
+
+An existing progress.json is imported once on first use and then renamed
+to progress.json.migrated.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import config
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class ProgressStore:
+    """(case_id, doc_index) -> status, safe to share between processes."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        legacy_json: str | Path | None = None,
+        stale_after: float = config.CLAIM_STALE_AFTER,
+    ):
+        # Defaults erst hier auflesen: bei --shard zeigt config auf das Shard-Verzeichnis
+        self.path = Path(path or config.PROGRESS_DB)
+        legacy_json = legacy_json or config.PROGRESS_FILE
+        self.stale_after = stale_after
+        self._claims: set[tuple[str, int]] = set()
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=30000")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS progress (
+                case_id    TEXT NOT NULL,
+                doc_index  INTEGER NOT NULL,
+                status     TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (case_id, doc_index)
+            )"""
+        )
+        self._migrate_json(Path(legacy_json))
+
+    def _migrate_json(self, json_path: Path) -> None:
+        if not json_path.exists():
+            return
+        # unter dem Schreib-Lock: ein zweiter Prozess wartet und findet die
+        # Datei danach schon umbenannt vor
+        with self._transaction():
+            if not json_path.exists():
+                return
+            with open(json_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            now = time.time()
+            rows = [
+                (case_id, int(doc_index), status, now)
+                for case_id, docs in raw.items()
+                for doc_index, status in docs.items()
+            ]
+            # bestehende Eintraege in der Datenbank haben Vorrang
+            self._db.executemany("INSERT OR IGNORE INTO progress VALUES (?, ?, ?, ?)", rows)
+            json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+        print(f"{len(rows)} Eintraege aus {json_path.name} nach {self.path.name} uebernommen")
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def get(self, case_id: str, doc_index: int) -> str:
+        row = self._db.execute(
+            "SELECT status FROM progress WHERE case_id = ? AND doc_index = ?",
+            (case_id, doc_index),
+        ).fetchone()
+        return row[0] if row else PENDING
+
+    def case_statuses(self, case_id: str) -> dict[int, str]:
+        """{doc_index: status} of one case (documents without a row are pending)."""
+        rows = self._db.execute(
+            "SELECT doc_index, status FROM progress WHERE case_id = ?", (case_id,)
+        )
+        return dict(rows)
+
+    def completed(self) -> set[tuple[str, int]]:
+        rows = self._db.execute(
+            "SELECT case_id, doc_index FROM progress WHERE status = ?", (COMPLETED,)
+        )
+        return set(rows)
+
+    def claim(self, case_id: str, doc_index: int) -> bool:
+        """Atomically mark a document as running. False if it is done or claimed elsewhere."""
+        now = time.time()
+        with self._transaction():
+            self._db.execute(
+                "INSERT OR IGNORE INTO progress VALUES (?, ?, ?, ?)",
+                (case_id, doc_index, PENDING, now),
+            )
+            cursor = self._db.execute(
+                """UPDATE progress SET status = ?, updated_at = ?
+                   WHERE case_id = ? AND doc_index = ?
+                     AND (status IN (?, ?) OR (status = ? AND updated_at < ?))""",
+                (RUNNING, now, case_id, doc_index, PENDING, FAILED, RUNNING, now - self.stale_after),
+            )
+        if cursor.rowcount != 1:
+            return False
+        self._claims.add((case_id, doc_index))
+        return True
+
+    def set_status(self, case_id: str, doc_index: int, status: str) -> None:
+        self._claims.discard((case_id, doc_index))
+        self._db.execute(
+            """INSERT INTO progress VALUES (?, ?, ?, ?)
+               ON CONFLICT (case_id, doc_index)
+               DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at""",
+            (case_id, doc_index, status, time.time()),
+        )
+
+    def set_many(self, entries: list[tuple[str, int, str]]) -> None:
+        """`(case_id, doc_index, status)` entries in one transaction."""
+        if not entries:
+            return
+        now = time.time()
+        for case_id, doc_index, _ in entries:
+            self._claims.discard((case_id, doc_index))
+        with self._transaction():
+            self._db.executemany(
+                """INSERT INTO progress VALUES (?, ?, ?, ?)
+                   ON CONFLICT (case_id, doc_index)
+                   DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at""",
+                [(case_id, doc_index, status, now) for case_id, doc_index, status in entries],
+            )
+
+    def release_claims(self) -> None:
+        """Put documents claimed by this process but never finished back to pending."""
+        if not self._claims:
+            return
+        with self._transaction():
+            self._db.executemany(
+                "UPDATE progress SET status = ? WHERE case_id = ? AND doc_index = ? AND status = ?",
+                [(PENDING, case_id, doc_index, RUNNING) for case_id, doc_index in self._claims],
+            )
+        self._claims.clear()
+
+    def merge_from(self, other: str | Path) -> int:
+        """Import the rows of another progress database (e.g. of a shard).
+
+        A completed document stays completed; otherwise the more recent row
+        wins. Rows still "running" in the other database are skipped, their
+        worker may not be finished. Returns the number of rows read.
+        """
+        self._db.execute("ATTACH DATABASE ? AS other", (str(other),))
+        try:
+            with self._transaction():
+                cursor = self._db.execute(
+                    """INSERT INTO progress
+                       SELECT case_id, doc_index, status, updated_at FROM other.progress
+                       WHERE status != ?
+                       ON CONFLICT (case_id, doc_index) DO UPDATE
+                       SET status = excluded.status, updated_at = excluded.updated_at
+                       WHERE progress.status != ?
+                         AND (excluded.status = ? OR excluded.updated_at > progress.updated_at)""",
+                    (RUNNING, COMPLETED, COMPLETED),
+                )
+                count = cursor.rowcount
+        finally:
+            self._db.execute("DETACH DATABASE other")
+        return count
+
+    def summary(self) -> dict[str, dict[str, int]]:
+        """{case_id: {status: count}} in a single aggregate query."""
+        out: dict[str, dict[str, int]] = {}
+        rows = self._db.execute(
+            "SELECT case_id, status, COUNT(*) FROM progress GROUP BY case_id, status"
+        )
+        for case_id, status, count in rows:
+            out.setdefault(case_id, {})[status] = count
+        return out
+
+    def close(self) -> None:
+        self.release_claims()
+        self._db.close()
+
+    def __enter__(self) -> "ProgressStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK (takes the write lock up front)."""
+
+    def __init__(self, db: sqlite3.Connection):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, *exc) -> None:
+        self._db.execute("ROLLBACK" if exc_type else "COMMIT")
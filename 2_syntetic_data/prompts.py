@@ -523,20 +523,22 @@ def get_template(doc_type: str) -> dict[str, Any]:
     }
 
 
-def build_user_prompt(case_bible: dict, doc_entry: dict, template: dict) -> str:
-    """Build the user prompt for a single document generation."""
-    sprache = doc_entry.get("sprache", case_bible.get("sprache", "DE"))
+def _case_section(case_bible: dict, sprache: str, sort_keys: bool = False) -> str:
+    case_json = json.dumps(case_bible, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+    if sprache == "FR":
+        return f"## Case-Bible (contexte du cas)\n\n```json\n{case_json}\n```"
+    return f"## Case-Bible (Fallkontext)\n\n```json\n{case_json}\n```"
+
+
+def _document_section(doc_entry: dict, template: dict, sprache: str) -> str:
     beschreibung_key = "beschreibung_fr" if sprache == "FR" else "beschreibung_de"
     beschreibung = template.get(beschreibung_key, template.get("beschreibung_de", ""))
 
     min_w, max_w = template["woerter"]
     struktur_text = "\n".join(f"  - {s}" for s in template["struktur"])
 
-    case_json = json.dumps(case_bible, indent=2, ensure_ascii=False)
-
     if sprache == "FR":
-        prompt = (
-            f"## Case-Bible (contexte du cas)\n\n```json\n{case_json}\n```\n\n"
+        return (
             f"## Document à générer\n\n"
             f"- **Type** : {doc_entry['typ']}\n"
             f"- **Date** : {doc_entry['datum']}\n"
@@ -549,20 +551,56 @@ def build_user_prompt(case_bible: dict, doc_entry: dict, template: dict) -> str:
             f"Rédigez le document complet en français. "
             f"Utilisez UNIQUEMENT les faits du Case-Bible ci-dessus."
         )
-    else:
-        prompt = (
-            f"## Case-Bible (Fallkontext)\n\n```json\n{case_json}\n```\n\n"
-            f"## Zu generierendes Dokument\n\n"
-            f"- **Typ** : {doc_entry['typ']}\n"
-            f"- **Datum** : {doc_entry['datum']}\n"
-            f"- **Beschreibung** : {beschreibung}\n"
-            f"- **Verfasser** : {template['verfasser']}\n"
-            f"- **Empfänger** : {template['empfaenger']}\n"
-            f"- **Ton** : {template['ton']}\n"
-            f"- **Länge** : {min_w}–{max_w} Wörter\n\n"
-            f"## Erwartete Struktur\n\n{struktur_text}\n\n"
-            f"Erstelle das vollständige Dokument auf Deutsch. "
-            f"Verwende NUR Fakten aus der obigen Case-Bible."
-        )
+    return (
+        f"## Zu generierendes Dokument\n\n"
+        f"- **Typ** : {doc_entry['typ']}\n"
+        f"- **Datum** : {doc_entry['datum']}\n"
+        f"- **Beschreibung** : {beschreibung}\n"
+        f"- **Verfasser** : {template['verfasser']}\n"
+        f"- **Empfänger** : {template['empfaenger']}\n"
+        f"- **Ton** : {template['ton']}\n"
+        f"- **Länge** : {min_w}–{max_w} Wörter\n\n"
+        f"## Erwartete Struktur\n\n{struktur_text}\n\n"
+        f"Erstelle das vollständige Dokument auf Deutsch. "
+        f"Verwende NUR Fakten aus der obigen Case-Bible."
+    )
+
+
+def build_user_prompt(case_bible: dict, doc_entry: dict, template: dict) -> str:
+    """Build the user prompt for a single document generation."""
+    sprache = doc_entry.get("sprache", case_bible.get("sprache", "DE"))
+    return (
+        f"{_case_section(case_bible, sprache)}\n\n"
+        f"{_document_section(doc_entry, template, sprache)}"
+    )
+
+
+def build_case_prefix(case_bible: dict) -> str:
+    """First user message shared by all documents of a case (prefix layout).
+
+    Depends only on the case bible: framed in the case language, keys
+    sorted. It is byte-identical for every document of the case, so
+    together with the system prompt of the case language it forms a
+    prefix the provider can serve from its prompt cache.
+    """
+    return _case_section(case_bible, case_bible.get("sprache", "DE"), sort_keys=True)
+
 
+def build_document_prompt(case_bible: dict, doc_entry: dict, template: dict) -> str:
+    """Document-specific instructions, sent after the case prefix."""
+    case_sprache = case_bible.get("sprache", "DE")
+    sprache = doc_entry.get("sprache", case_sprache)
+    prompt = _document_section(doc_entry, template, sprache)
+    if sprache != case_sprache:
+        # System-Prompt und Prefix folgen der Fallsprache, das Dokument nicht
+        if sprache == "FR":
+            prompt = (
+                "Remarque : ce document doit être rédigé en français, "
+                "contrairement à la langue du dossier.\n\n" + prompt
+            )
+        else:
+            prompt = (
+                "Hinweis: Dieses Dokument ist auf Deutsch zu verfassen, "
+                "abweichend von der Sprache des Falls.\n\n" + prompt
+            )
     return prompt
@@ -0,0 +1,141 @@
+"""Client-side rate limiting against the provider's RPM/TPM limits.
+
+`RateLimiter` keeps two token buckets, one for requests and one for tokens
+per minute, each filled to a share (`headroom`) of the configured limit.
+Before a call it reserves one request and the estimated token cost of the
+call (prompt estimate + max_completion_tokens, which is how the provider
+counts it too); afterwards `settle()` refunds what the call did not use.
+A 429 with Retry-After pauses all callers until the provider is ready again.
+
+`AdaptiveConcurrency` caps the number of in-flight async calls. It grows
+by one slot per full window of successful calls and halves on a 429, at
+most once per cooldown (AIMD), so the pipeline settles just below the
+provider limits.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import config
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for German/French prose)."""
+    return len(text) // 4 + 1
+
+
+def estimate_request_tokens(request: dict) -> int:
+    """Estimated TPM cost of a chat request: prompt tokens plus the completion budget."""
+    prompt = sum(estimate_tokens(m["content"]) for m in request["messages"])
+    return prompt + request.get("max_completion_tokens", 0)
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    """Shared RPM + TPM budget for all threads and async tasks of a process."""
+
+    def __init__(
+        self,
+        rpm: int = config.RATE_LIMIT_RPM,
+        tpm: int = config.RATE_LIMIT_TPM,
+        headroom: float = config.RATE_LIMIT_HEADROOM,
+    ):
+        self._requests = _Bucket(rpm * headroom)
+        self._tokens = _Bucket(tpm * headroom)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_reserve(self, tokens: int) -> float:
+        """Reserve the budget and return 0, or return how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            # a single request larger than the whole bucket would never fit
+            tokens = min(tokens, self._tokens.capacity)
+            wait = max(self._requests.wait_time(1), self._tokens.wait_time(tokens))
+            if wait == 0:
+                self._requests.level -= 1
+                self._tokens.level -= tokens
+            return wait
+
+    def acquire(self, tokens: int) -> None:
+        """Block until one request and `tokens` tokens are available."""
+        while (wait := self._try_reserve(tokens)) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        while (wait := self._try_reserve(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """Refund tokens that were reserved but not used by the call."""
+        if used >= reserved:
+            return
+        with self._lock:
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - used)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for `seconds` (Retry-After of a 429)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """Async concurrency cap between 1 and `maximum`, adjusted by AIMD."""
+
+    def __init__(self, maximum: int, cooldown: float = 5.0):
+        self.maximum = maximum
+        self.limit = maximum
+        # 429s of calls that were already in flight count as one event
+        self.cooldown = cooldown
+        self._last_decrease = float("-inf")
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(1, self.limit // 2)
+        if new_limit < self.limit:
+            print(f"  Rate-Limit erreicht, Parallelitaet {self.limit} -> {new_limit}")
+        self.limit = new_limit
+        self._successes = 0
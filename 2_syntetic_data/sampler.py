@@ -0,0 +1,338 @@
+"""Parametric sampler for synthetic case bibles.
+
+The 20 hand-written cases in data/case_bibles.json are far too few to
+load-test retrieval. `sample_case_bibles` draws any number of valid
+`CaseBible` instances from the distributions below:
+
+- canton (weighted by case volume) -> language, court
+- cluster (weighted) -> industry, legal norms, disputed points, amounts
+- claim amount: log-normal per cluster; expected range and deductible
+  are derived from it
+- document plan: a claim notification followed by the extrajudicial
+  phase, then possibly conciliation, court or arbitration; every stage
+  is optional with its own probability, dates are strictly increasing
+
+Sampling is deterministic for a given seed, and cases are produced one at
+a time, so `write_jsonl` can write millions of them in constant memory.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from collections.abc import Iterable, Iterator
+from datetime import date, timedelta
+from pathlib import Path
+
+from models import CaseBible
+
+# Kanton -> (Gewicht, Sprache(n), Gericht); zweisprachige Kantone mit zwei Sprachen
+KANTONE: dict[str, tuple[float, tuple[str, ...], str]] = {
+    "ZH": (18, ("DE",), "Bezirksgericht Zürich"),
+    "BE": (12, ("DE", "FR"), "Regionalgericht Bern-Mittelland"),
+    "AG": (8, ("DE",), "Bezirksgericht Baden"),
+    "SG": (6, ("DE",), "Kreisgericht St. Gallen"),
+    "LU": (5, ("DE",), "Bezirksgericht Luzern"),
+    "BS": (4, ("DE",), "Zivilgericht Basel-Stadt"),
+    "BL": (3, ("DE",), "Zivilkreisgericht Basel-Landschaft West"),
+    "TG": (3, ("DE",), "Bezirksgericht Frauenfeld"),
+    "SO": (3, ("DE",), "Richteramt Solothurn-Lebern"),
+    "GR": (2, ("DE",), "Regionalgericht Plessur"),
+    "ZG": (2, ("DE",), "Kantonsgericht Zug"),
+    "VD": (10, ("FR",), "Tribunal civil de l'arrondissement de Lausanne"),
+    "GE": (8, ("FR",), "Tribunal de première instance de Genève"),
+    "NE": (2, ("FR",), "Tribunal régional du Littoral et du Val-de-Travers"),
+    "JU": (1, ("FR",), "Tribunal de première instance du Jura"),
+    "FR": (3, ("FR", "DE"), "Tribunal civil de la Sarine"),
+    "VS": (3, ("FR", "DE"), "Tribunal du district de Sion"),
+}
+
+# Cluster -> Gewicht, Branchen, Normen, Streitpunkte, Deckung, Kurzbeschreibung,
+# Median und Streuung (log-normal) der Forderung in CHF
+CLUSTERS: dict[str, dict] = {
+    "Wasser/Abdichtung": {
+        "weight": 25,
+        "branchen": ["Bau", "Sanitär", "Flachdach", "Gebäudetechnik"],
+        "normen": ["OR 41", "OR 58", "OR 97", "OR 368", "SIA 118", "SIA 271"],
+        "strittig": ["Kausalität", "Mangelhafte Abdichtung", "Schadenhöhe", "Abzug neu für alt", "Rügefrist"],
+        "deckung": ["BHV", "Bauherrenhaftpflicht", "Gebäudeversicherung (Regress)"],
+        "kurz": "Wassereintritt durch {ursache} in {objekt}",
+        "ursachen": ["undichte Flachdachabdichtung", "fehlerhaften Leitungsanschluss", "mangelhafte Fensteranschlüsse",
+                     "defekte Duschabdichtung"],
+        "median": 60_000,
+        "sigma": 0.9,
+    },
+    "Brand/Explosion": {
+        "weight": 10,
+        "branchen": ["Elektro", "Gastronomie", "Heizung/Lüftung", "Dachdecker"],
+        "normen": ["OR 41", "OR 55", "OR 97", "NIV", "VKF-Brandschutzrichtlinien"],
+        "strittig": ["Brandursache", "Kausalität", "Sorgfaltspflicht", "Schadenhöhe", "Regress des Gebäudeversicherers"],
+        "deckung": ["BHV", "Feuerversicherung (Regress)"],
+        "kurz": "Brand infolge {ursache} in {objekt}",
+        "ursachen": ["Heissarbeiten", "einer fehlerhaften Elektroinstallation", "eines überhitzten Geräts"],
+        "median": 250_000,
+        "sigma": 1.1,
+    },
+    "Baumängel/Statik": {
+        "weight": 15,
+        "branchen": ["Bau", "Ingenieurbüro", "Holzbau", "Fassadenbau"],
+        "normen": ["OR 363", "OR 367", "OR 368", "OR 371", "SIA 118", "SIA 260"],
+        "strittig": ["Mangel", "Rügefrist", "Verjährung", "Nachbesserungskosten", "Planungsfehler"],
+        "deckung": ["BHV", "Planerhaftpflicht"],
+        "kurz": "{ursache} an {objekt}",
+        "ursachen": ["Setzungsrisse", "Durchbiegung der Decke", "Ablösung der Fassadenplatten"],
+        "median": 150_000,
+        "sigma": 1.0,
+    },
+    "Erschütterung/Rissbildung": {
+        "weight": 12,
+        "branchen": ["Tiefbau", "Spezialtiefbau", "Abbruch"],
+        "normen": ["ZGB 679", "ZGB 684", "ZGB 685", "OR 41", "SN 640 312a"],
+        "strittig": ["Kausalität", "Vorschäden", "Übermässigkeit der Einwirkung", "Schadenhöhe"],
+        "deckung": ["BHV", "Bauherrenhaftpflicht"],
+        "kurz": "Rissbildung an {objekt} durch {ursache}",
+        "ursachen": ["Rammarbeiten", "Abbrucharbeiten", "Grundwasserabsenkung", "Sprengarbeiten"],
+        "median": 45_000,
+        "sigma": 0.8,
+    },
+    "Umwelt/Immissionen": {
+        "weight": 6,
+        "branchen": ["Industrie", "Landwirtschaft", "Entsorgung"],
+        "normen": ["ZGB 679", "ZGB 684", "USG 59a", "GSchG 6", "OR 41"],
+        "strittig": ["Kausalität", "Widerrechtlichkeit", "Sanierungskosten", "Verursacheranteil"],
+        "deckung": ["BHV", "Umwelthaftpflicht"],
+        "kurz": "Verunreinigung von {objekt} durch {ursache}",
+        "ursachen": ["auslaufendes Heizöl", "Löschwasser", "Düngemittel"],
+        "median": 90_000,
+        "sigma": 1.2,
+    },
+    "Personenschaden/Unfall": {
+        "weight": 10,
+        "branchen": ["Bau", "Gerüstbau", "Liegenschaftsverwaltung", "Detailhandel"],
+        "normen": ["OR 41", "OR 46", "OR 47", "OR 58", "OR 55"],
+        "strittig": ["Haftung dem Grunde nach", "Selbstverschulden", "Erwerbsausfall", "Genugtuung"],
+        "deckung": ["BHV", "Werkeigentümerhaftpflicht"],
+        "kurz": "Sturz {ursache} in {objekt}",
+        "ursachen": ["auf einer ungesicherten Treppe", "von einem Gerüst", "auf nassem Boden"],
+        "median": 80_000,
+        "sigma": 1.0,
+    },
+    "Produkt/Lieferung": {
+        "weight": 8,
+        "branchen": ["Handel", "Maschinenbau", "Elektro"],
+        "normen": ["PrHG 1", "OR 197", "OR 208", "OR 41"],
+        "strittig": ["Produktfehler", "Kausalität", "Mängelrüge", "Folgeschaden"],
+        "deckung": ["BHV", "Produktehaftpflicht"],
+        "kurz": "Folgeschaden durch {ursache} in {objekt}",
+        "ursachen": ["ein defektes Ventil", "eine fehlerhafte Steuerung", "ein mangelhaftes Bauteil"],
+        "median": 70_000,
+        "sigma": 1.0,
+    },
+}
+
+OBJEKTE = ["einem Mehrfamilienhaus", "einer Gewerbeliegenschaft", "einem Einfamilienhaus",
+           "einer Lagerhalle", "einem Bürogebäude", "einer Tiefgarage"]
+
+FIRMEN = ["Muster", "Alpen", "Brunner", "Keller", "Meier", "Steiner", "Dubois", "Favre", "Rochat",
+          "Bianchi", "Huber", "Schneider", "Gerber", "Bonvin", "Moser", "Frei", "Zürcher", "Perrin"]
+RECHTSFORMEN = {"DE": ["AG", "GmbH", "Bau AG", "& Co."], "FR": ["SA", "Sàrl", "Construction SA", "& Cie"]}
+VORNAMEN = ["Anna", "Beat", "Claudia", "Daniel", "Eva", "Marc", "Nicole", "Pierre", "Sophie", "Thomas"]
+NACHNAMEN = ["Ammann", "Berset", "Crettaz", "Fischer", "Girard", "Hofer", "Jaquet", "Kunz", "Lüthi", "Vuilleumier"]
+
+SB_CHOICES = [0, 500, 1_000, 2_000, 5_000, 10_000]
+PE_LOGIC = [
+    "Quote nach Haftungsanteil abzüglich SB",
+    "Zeitwert statt Neuwert, abzüglich SB",
+    "Vergleichsbereitschaft bei 50-70 % der Forderung",
+    "Reserve nach Expertise, Kosten der Gegenexpertise eingerechnet",
+]
+
+# Phasen des Dokumentplans: je Dokumenttyp die Wahrscheinlichkeit, dass er vorkommt
+AUSSERGERICHTLICH = [
+    ("akteneinholung_vn", 0.8),
+    ("stellungnahme_vn", 0.7),
+    ("Haftpflichtversicherungbesichtigung_protokoll", 0.4),
+    ("Haftpflichtversicherungschreiben_an_g01", 0.7),
+    ("parteigutachten_g01", 0.4),
+    ("gemeinsame_expertise_auftrag", 0.3),
+    ("expertenbericht", 0.35),
+    ("sanierungskonzept", 0.2),
+    ("vergleichsangebot", 0.5),
+]
+SCHLICHTUNG = [
+    ("Haftpflichtversicherungschreiben_vertretung", 0.5),
+    ("schlichtungsgesuch", 1.0),
+    ("schlichtungsvorladung", 0.8),
+    ("schlichtungsprotokoll", 1.0),
+]
+GERICHT = [
+    ("prozessmeldung_intern", 0.7),
+    ("streitverkuendung", 0.2),
+    ("klage", 1.0),
+    ("klageantwort", 0.95),
+    ("gericht_verfuegung", 0.7),
+    ("gesuch_vbo", 0.15),
+    ("gerichtsexpertise", 0.5),
+    ("verhandlung_protokoll", 0.7),
+    ("urteilsauszug", 0.6),
+]
+SCHIEDSGERICHT = [
+    ("arbitre_verfuegung", 1.0),
+    ("schiedsspruch", 0.8),
+]
+ABSCHLUSS = [
+    ("ev_saldo", 0.5),
+    ("regressschreiben", 0.15),
+    ("abschlussnotiz", 0.6),
+]
+# Wahrscheinlichkeit der Eskalationsstufen nach der aussergerichtlichen Phase
+P_SCHLICHTUNG = 0.35
+P_GERICHT = 0.5  # bedingt: nur nach einer Schlichtung
+P_SCHIEDSGERICHT = 0.03
+# Anteil der Dokumente in der zweiten Sprache eines zweisprachigen Kantons
+P_ZWEITSPRACHE = 0.15
+
+# Dokumenttypen, die als Ereignis in die Zeitleiste uebernommen werden
+MEILENSTEINE = {
+    "schadenanmeldung": "Schadenmeldung an die Haftpflichtversicherung",
+    "expertenbericht": "Expertenbericht liegt vor",
+    "schlichtungsgesuch": "Schlichtungsgesuch eingereicht",
+    "klage": "Klage eingereicht",
+    "urteilsauszug": "Urteil erster Instanz",
+    "schiedsspruch": "Schiedsspruch",
+}
+
+START_DATE = date(2018, 1, 1)
+END_DATE = date(2024, 12, 31)
+
+
+def _weighted(rng: random.Random, table: dict) -> str:
+    keys = list(table)
+    weights = [v[0] if isinstance(v, tuple) else v["weight"] for v in table.values()]
+    return rng.choices(keys, weights=weights)[0]
+
+
+def _firma(rng: random.Random, sprache: str) -> str:
+    return f"{rng.choice(FIRMEN)} {rng.choice(RECHTSFORMEN[sprache])}"
+
+
+def _anwalt(rng: random.Random, sprache: str) -> str:
+    titel = "RA lic. iur." if sprache == "DE" else "Me"
+    return f"{titel} {rng.choice(VORNAMEN)} {rng.choice(NACHNAMEN)}"
+
+
+def _round(amount: float, step: int = 500) -> float:
+    return float(max(step, round(amount / step) * step))
+
+
+def _stage(rng: random.Random, entries: list[tuple[str, float]]) -> list[str]:
+    return [typ for typ, p in entries if rng.random() < p]
+
+
+def sample_dokument_plan(rng: random.Random) -> tuple[list[str], str]:
+    """Document types in procedural order, and the resulting case status."""
+    plan = ["schadenanmeldung"] + _stage(rng, AUSSERGERICHTLICH)
+    status = "aussergerichtlich"
+    if rng.random() < P_SCHIEDSGERICHT:
+        plan += _stage(rng, SCHIEDSGERICHT)
+        status = "schiedsgericht"
+    elif rng.random() < P_SCHLICHTUNG:
+        plan += _stage(rng, SCHLICHTUNG)
+        status = "schlichtung"
+        if rng.random() < P_GERICHT:
+            plan += _stage(rng, GERICHT)
+            status = "gericht"
+    closing = _stage(rng, ABSCHLUSS)
+    plan += closing
+    if "abschlussnotiz" in closing:
+        status = "abgeschlossen"
+    return plan, status
+
+
+def sample_case_bible(rng: random.Random, case_id: str) -> CaseBible:
+    """One random, schema-valid case bible."""
+    kanton = _weighted(rng, KANTONE)
+    _, sprachen, gericht = KANTONE[kanton]
+    sprache = sprachen[0] if len(sprachen) == 1 or rng.random() < 0.7 else sprachen[1]
+    cluster = _weighted(rng, CLUSTERS)
+    c = CLUSTERS[cluster]
+
+    forderung = _round(rng.lognormvariate(0, c["sigma"]) * c["median"])
+    spanne_min = _round(forderung * rng.uniform(0.3, 0.6))
+    spanne_max = max(spanne_min, _round(forderung * rng.uniform(0.6, 0.95)))
+
+    typen, status = sample_dokument_plan(rng)
+    # Schadendatum so waehlen, dass der ganze Plan vor END_DATE liegt
+    gaps = [rng.randint(7, 90) for _ in typen]
+    latest_start = (END_DATE - START_DATE).days - sum(gaps) - 30
+    ereignis = START_DATE + timedelta(days=rng.randint(0, max(0, latest_start)))
+    datum = ereignis + timedelta(days=rng.randint(1, 30))
+    dokument_plan = []
+    for typ, gap in zip(typen, gaps):
+        doc_sprache = sprache
+        if len(sprachen) > 1 and rng.random() < P_ZWEITSPRACHE:
+            doc_sprache = sprachen[1] if sprache == sprachen[0] else sprachen[0]
+        dokument_plan.append({"typ": typ, "datum": datum.isoformat(), "sprache": doc_sprache})
+        datum += timedelta(days=gap)
+
+    vn = _firma(rng, sprache)
+    while (g01 := _firma(rng, sprache)) == vn:
+        pass
+
+    objekt = rng.choice(OBJEKTE)
+    kurz = c["kurz"].format(ursache=rng.choice(c["ursachen"]), objekt=objekt)
+    zeitleiste = [{"t": ereignis.isoformat(), "event": kurz}]
+    zeitleiste += [
+        {"t": d["datum"], "event": MEILENSTEINE[d["typ"]]}
+        for d in dokument_plan
+        if d["typ"] in MEILENSTEINE
+    ]
+
+    return CaseBible(
+        case_id=case_id,
+        sprache=sprache,
+        kanton=kanton,
+        gericht=gericht,
+        branche=rng.choice(c["branchen"]),
+        cluster=cluster,
+        parteien={
+            "vn": vn,
+            "g01": g01,
+            "anwalt_vn": _anwalt(rng, sprache),
+            "anwalt_g01": _anwalt(rng, sprache),
+        },
+        sachverhalt={"kurz": kurz, "zeitleiste": zeitleiste},
+        recht={
+            "normen": rng.sample(c["normen"], k=rng.randint(2, min(4, len(c["normen"])))),
+            "strittig": rng.sample(c["strittig"], k=rng.randint(1, 3)),
+            "deckung": [rng.choice(c["deckung"])],
+        },
+        betraege={
+            "forderung_brutto": forderung,
+            "erwartete_spanne": {"min": spanne_min, "max": spanne_max},
+            "sb": float(rng.choice(SB_CHOICES)),
+            "pe_logic": rng.choice(PE_LOGIC),
+        },
+        status=status,
+        dokument_plan=dokument_plan,
+    )
+
+
+def sample_case_bibles(n: int, seed: int = 0, prefix: str = "S") -> Iterator[CaseBible]:
+    """`n` case bibles with ids S000001, S000002, ... (deterministic per seed)."""
+    rng = random.Random(seed)
+    width = max(6, len(str(n)))
+    for i in range(1, n + 1):
+        yield sample_case_bible(rng, f"{prefix}{i:0{width}d}")
+
+
+def write_jsonl(case_bibles: Iterable[CaseBible], path: str | Path) -> int:
+    """Write one case bible per line; returns the number of cases written."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for cb in case_bibles:
+            f.write(json.dumps(cb.model_dump(), ensure_ascii=False) + "\n")
+            count += 1
+    return count
@@ -0,0 +1,126 @@
+"""Split the corpus over several worker processes or hosts.
+
+`generate-all --shard i/N` generates only the cases whose stable hash
+(sha256 of the case_id) falls into shard i of N, so any number of
+workers can split a case file without talking to each other. Each shard
+writes into its own directory, shards/shard-i-of-N/, with its own
+output/, dataset/, progress.sqlite, usage.jsonl, completion_cache.sqlite
+and batches/; shards never touch the same file, even on a shared file
+system. A shard therefore does not see the main completion cache.
+
+`merge-shards` folds the shard directories into the main output/,
+dataset/, progress.sqlite, usage.jsonl and completion_cache.sqlite. It
+can run again at any time: files are overwritten with identical content,
+progress rows are upserted (completed wins), cache entries are only added
+and merged usage logs are renamed to usage.jsonl.merged, so nothing is
+counted twice.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import config
+from completion_cache import CompletionCache
+from progress_store import ProgressStore
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` (1-based) of `count`."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """'2/8' -> Shard(2, 8); raises ValueError for anything else."""
+        index, sep, count = spec.partition("/")
+        if not sep:
+            raise ValueError(spec)
+        shard = cls(int(index), int(count))
+        if not 1 <= shard.index <= shard.count:
+            raise ValueError(spec)
+        return shard
+
+    @property
+    def name(self) -> str:
+        return f"shard-{self.index}-of-{self.count}"
+
+    @property
+    def directory(self) -> Path:
+        return config.SHARDS_DIR / self.name
+
+    def owns(self, case_id: str) -> bool:
+        return shard_of(case_id, self.count) == self.index
+
+
+def shard_of(case_id: str, count: int) -> int:
+    """Stable 1-based shard number of a case (same on every host and Python run)."""
+    digest = hashlib.sha256(case_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def activate(shard: Shard) -> None:
+    """Point all per-run files of this process into the shard directory."""
+    base = shard.directory
+    base.mkdir(parents=True, exist_ok=True)
+    config.OUTPUT_DIR = base / "output"
+    config.DATASET_DIR = base / "dataset"
+    config.PROGRESS_DB = base / "progress.sqlite"
+    config.PROGRESS_FILE = base / "progress.json"
+    config.USAGE_LOG_FILE = base / "usage.jsonl"
+    config.COMPLETION_CACHE_FILE = base / "completion_cache.sqlite"
+    config.BATCH_DIR = base / "batches"
+    config.BATCH_STATE_FILE = config.BATCH_DIR / "jobs.json"
+
+
+def shard_directories() -> list[Path]:
+    if not config.SHARDS_DIR.exists():
+        return []
+    return sorted(p for p in config.SHARDS_DIR.iterdir() if p.is_dir())
+
+
+def merge_shard(shard_dir: str | Path, store: ProgressStore, cache: CompletionCache) -> dict:
+    """Copy one shard's output, progress, completion cache and usage log into the main files."""
+    shard_dir = Path(shard_dir)
+    stats = {"files": 0, "progress_rows": 0, "cache_entries": 0, "usage_lines": 0}
+
+    # Dataset-Teile tragen Zeitstempel und PID im Namen, kollidieren also nicht
+    copies = [(shard_dir / "output", config.OUTPUT_DIR), (shard_dir / "dataset", config.DATASET_DIR)]
+    for src_dir, dst_dir in copies:
+        if not src_dir.exists():
+            continue
+        for src in src_dir.rglob("*"):
+            if src.is_file():
+                dst = dst_dir / src.relative_to(src_dir)
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, dst)
+                stats["files"] += 1
+
+    progress = shard_dir / "progress.sqlite"
+    if progress.exists():
+        stats["progress_rows"] = store.merge_from(progress)
+
+    shard_cache = shard_dir / "completion_cache.sqlite"
+    if shard_cache.exists():
+        stats["cache_entries"] = cache.merge_from(shard_cache)
+
+    usage = shard_dir / "usage.jsonl"
+    if usage.exists():
+        # erst umbenennen: ein noch laufender Shard schreibt dann in eine neue Datei
+        merging = usage.replace(shard_dir / "usage.jsonl.merging")
+        with open(merging, "rb") as src, open(config.USAGE_LOG_FILE, "ab") as dst:
+            for line in src:
+                # abgeschnittene letzte Zeile eines abgebrochenen Laufs nicht uebernehmen
+                if line.endswith(b"\n"):
+                    dst.write(line)
+                    stats["usage_lines"] += 1
+        with open(merging, "rb") as src, open(shard_dir / "usage.jsonl.merged", "ab") as dst:
+            shutil.copyfileobj(src, dst)
+        merging.unlink()
+
+    return stats
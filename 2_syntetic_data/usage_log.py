@@ -0,0 +1,168 @@
+"""Append-only JSONL log of every API call: token usage and timing.
+
+One line per API call (direct or batch):
+
+    {"ts": ..., "model": ..., "doc_id": ..., "doc_type": ..., "source": "api" | "batch",
+     "prompt_tokens": ..., "cached_tokens": ..., "completion_tokens": ...,
+     "latency_s": ..., "retries": ..., "ok": true | false}
+
+`cached_tokens` is the part of the prompt the provider served from its
+prompt cache (usage.prompt_tokens_details.cached_tokens); comparing it
+between prompt layouts shows what the shared case prefix saves.
+`latency_s` is the duration of the call itself (without waiting for the
+rate limiter), `retries` the number of earlier attempts for the same
+document and `ok` whether the answer passed the document checks. A call
+that raised (429, timeout, server error) is logged without tokens and
+with `error` set to the exception class. A stream closed at the word
+budget never gets its usage chunk; its tokens are estimated and the line
+carries `usage_estimated`. Batch lines have no latency.
+Answers from the local completion cache cost nothing and are not logged.
+
+`summarize()` folds the log into the figures shown by `main.py status`.
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import config
+
+_lock = threading.Lock()
+
+
+def _as_dict(usage) -> dict:
+    if usage is None:
+        return {}
+    if hasattr(usage, "model_dump"):
+        return usage.model_dump()
+    return dict(usage)
+
+
+def usage_entry(
+    model: str,
+    usage,
+    doc_id: str | None = None,
+    source: str = "api",
+    **fields,
+) -> dict:
+    """Log line for an API usage object (SDK model or the dict of a batch result).
+
+    Extra keyword arguments are added to the line as they are.
+    """
+    usage = _as_dict(usage)
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "ts": time.time(),
+        "model": model,
+        "doc_id": doc_id,
+        "source": source,
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        **fields,
+    }
+
+
+def record(entries: list[dict], path: str | Path | None = None) -> None:
+    if not entries:
+        return
+    path = path or config.USAGE_LOG_FILE
+    lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+    with _lock, open(path, "a", encoding="utf-8") as f:
+        f.write(lines)
+
+
+def read(path: str | Path | None = None) -> Iterator[dict]:
+    path = Path(path or config.USAGE_LOG_FILE)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # letzte Zeile kann bei einem Absturz abgeschnitten sein
+                continue
+
+
+def _percentile(values: list[float], q: int) -> float | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def summarize(
+    path: str | Path | None = None,
+    window: float = config.METRICS_WINDOW,
+) -> dict:
+    """Totals and throughput over the whole log.
+
+    - calls, prompt/cached/completion tokens: sums over all lines;
+      reported_prompt_tokens: prompt tokens of lines with real usage (the
+      base for the prompt-cache share, estimates have no cached tokens);
+      estimated: lines whose usage is an estimate
+    - retries: per document the highest `retries` of its lines (each line
+      carries the attempt index, so summing would count 0+1+2+...);
+      rate_limited: calls that failed with a 429
+    - docs: accepted answers (ok), per doc type with their token sums
+    - latency_p50/p95: over all direct calls that got an answer, in seconds
+    - docs_per_min: accepted answers in the last `window` seconds of
+      activity, so pauses between runs do not dilute the rate
+    """
+    totals = {
+        "calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+        "reported_prompt_tokens": 0, "estimated": 0,
+        "retries": 0, "rate_limited": 0, "docs": 0,
+    }
+    by_type: dict[str, dict] = {}
+    retries_by_doc: dict[str, int] = {}
+    latencies: list[float] = []
+    done_at: list[float] = []
+    for entry in read(path):
+        totals["calls"] += 1
+        for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+            totals[key] += entry.get(key, 0)
+        if entry.get("usage_estimated"):
+            totals["estimated"] += 1
+        else:
+            totals["reported_prompt_tokens"] += entry.get("prompt_tokens", 0)
+        retries = entry.get("retries", 0)
+        if doc_id := entry.get("doc_id"):
+            retries_by_doc[doc_id] = max(retries_by_doc.get(doc_id, 0), retries)
+        else:
+            totals["retries"] += retries
+        if entry.get("error") == "RateLimitError":
+            totals["rate_limited"] += 1
+        if entry.get("latency_s") is not None and not entry.get("error"):
+            latencies.append(entry["latency_s"])
+        doc_type = entry.get("doc_type") or "?"
+        t = by_type.setdefault(doc_type, {"docs": 0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        t["calls"] += 1
+        t["prompt_tokens"] += entry.get("prompt_tokens", 0)
+        t["completion_tokens"] += entry.get("completion_tokens", 0)
+        # Zeilen aus der Zeit vor den Metriken haben kein "ok"
+        if entry.get("ok", True):
+            totals["docs"] += 1
+            t["docs"] += 1
+            done_at.append(entry["ts"])
+
+    totals["retries"] += sum(retries_by_doc.values())
+    latencies.sort()
+    totals["latency_p50"] = _percentile(latencies, 50)
+    totals["latency_p95"] = _percentile(latencies, 95)
+    totals["by_type"] = by_type
+    totals["docs_per_min"] = None
+    if done_at:
+        last = max(done_at)
+        recent = [ts for ts in done_at if ts >= last - window]
+        span = last - min(recent)
+        if len(recent) > 1 and span > 0:
+            totals["docs_per_min"] = (len(recent) - 1) / span * 60
+    return totals
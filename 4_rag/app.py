@@ -2,10 +2,20 @@
 
 import streamlit as st
 from rag_chain import ask
-from retriever import get_collection_stats
+from retriever import get_collection_stats, get_vectorstore
 
 st.set_page_config(page_title="Bauhaftpflicht RAG", layout="wide")
 
+
+# validate: nach einer neuen Verbindung (Index neu aufgebaut) nicht die alte behalten
+@st.cache_resource(validate=lambda vectorstore: vectorstore is get_vectorstore())
+def load_vectorstore():
+    """Einmal pro Server-Prozess verbinden, nicht bei jedem Rerun."""
+    return get_vectorstore()
+
+
+load_vectorstore()
+
 st.title("Bauhaftpflicht RAG-System")
 
 # Sidebar: Filter
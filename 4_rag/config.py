@@ -6,6 +6,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent
 DATA_PATH = BASE_DIR / ".." / "2_syntetic_data" / "output"
 CHROMA_PATH = BASE_DIR / "chroma_db"
+EMBEDDING_CACHE_PATH = BASE_DIR / "embedding_cache.sqlite"
 
 # Chunking
 CHUNK_SIZE = 1000
@@ -20,3 +21,20 @@ TOP_K = 5
 
 # ChromaDB
 COLLECTION_NAME = "bauhaftpflicht_cases"
+# Sekunden, die die gezählten Chunks für Statistiken gültig bleiben
+COLLECTION_STATS_TTL = 60
+# IDs pro Abfrage/Löschung beim inkrementellen Indexieren
+ID_PAGE_SIZE = 1000
+
+# Embedding: Batches nach geschätzten Tokens packen, mehrere parallel senden
+EMBEDDING_BATCH_TOKENS = 50_000
+EMBEDDING_BATCH_SIZE = 500
+EMBEDDING_WORKERS = 4
+EMBEDDING_RETRIES = 3
+# Vektoren pro Schreibvorgang in ChromaDB
+CHROMA_WRITE_BATCH = 5000
+# vorgelesene Batches zwischen Chunking und Einbettung
+INDEX_QUEUE_SIZE = 8
+
+# Embedding-Cache (ein 1536-dim. Vektor belegt ca. 6 KB)
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000
@@ -0,0 +1,166 @@
+"""Persistenter Embedding-Cache für Indexierung und Suche.
+
+`CachedEmbeddings` umhüllt ein beliebiges LangChain-Embeddings-Objekt.
+Schlüssel ist (Modell, sha256(text)); der Vektor liegt als float32-Blob
+in SQLite (WAL, mehrere Prozesse dürfen die Datei teilen).
+Ein unveränderter Chunk beim Reindexieren oder eine wiederholte Anfrage
+kostet damit keinen API-Aufruf mehr.
+
+Wird der Cache grösser als `max_entries`, fliegen die am längsten nicht
+benutzten Einträge raus (LRU). `stats()` liefert Treffer und Fehlschläge.
+
+Das Modul liest kein `config`: Modell, Pfad und Grösse übergibt der
+Aufrufer. So nutzt 5_agentic_rag dieselbe Datei (aus 4_rag importiert)
+mit seiner eigenen Konfiguration; beide zeigen über EMBEDDING_CACHE_PATH
+auf denselben Cache.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+# SQLite erlaubt nur begrenzt viele Parameter pro Abfrage
+_QUERY_CHUNK = 500
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _encode(vector: list[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode(blob: bytes) -> list[float]:
+    return array("f", blob).tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings mit SQLite-Cache vor dem eigentlichen Modell."""
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        path: str | Path,
+        max_entries: int,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model     TEXT NOT NULL,
+                key       TEXT NOT NULL,
+                vector    BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, key)
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings (last_used)")
+        self._db.commit()
+        # laufender Zähler, damit nicht jedes put die Tabelle zählt
+        self._count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? "
+                    f"AND key IN ({','.join('?' * len(chunk))})",
+                    [self.model, *chunk],
+                )
+                found.update((key, _decode(blob)) for key, blob in rows)
+            if found:
+                now = time.time()
+                with self._db:
+                    self._db.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                        [(now, self.model, key) for key in found],
+                    )
+        return found
+
+    def _put_many(self, items: dict[str, list[float]]) -> None:
+        now = time.time()
+        with self._lock:
+            with self._db:
+                # derselbe Text kann parallel in zwei Batches eingebettet worden sein
+                cursor = self._db.executemany(
+                    "INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)",
+                    [(self.model, key, _encode(vector), now) for key, vector in items.items()],
+                )
+            self._count += cursor.rowcount
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Älteste Einträge löschen, bis der Cache wieder passt (Aufrufer hält den Lock)."""
+        self._count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        with self._db:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+        self._count -= excess
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [text_key(t) for t in texts]
+        vectors = self._get_many(list(dict.fromkeys(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            new = dict(zip(missing, self.embeddings.embed_documents(list(missing.values()))))
+            self._put_many(new)
+            vectors.update(new)
+        # erst nach Erfolg zählen: ein wiederholter Batch zählt nicht doppelt;
+        # ein Text, der im Batch mehrfach vorkommt, ist ab dem zweiten Mal ein Treffer
+        self._count_lookups(len(texts) - len(missing), len(missing))
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = text_key(text)
+        if (vector := self._get_many([key]).get(key)) is not None:
+            self._count_lookups(1, 0)
+            return vector
+        vector = self.embeddings.embed_query(text)
+        self._put_many({key: vector})
+        self._count_lookups(0, 1)
+        return vector
+
+    def _count_lookups(self, hits: int, misses: int) -> None:
+        # mehrere Threads betten gleichzeitig ein (EMBEDDING_WORKERS)
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> dict:
+        return {"entries": self._count, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def cached_openai_embeddings(model: str, path: str | Path, max_entries: int) -> CachedEmbeddings:
+    """OpenAI-Embeddings (`model`) mit dem Cache unter `path`."""
+    return CachedEmbeddings(OpenAIEmbeddings(model=model), model, path, max_entries)
@@ -1,22 +1,56 @@
-"""Indexer: Dokumente laden, chunken und in ChromaDB speichern."""
+"""Indexer: Dokumente laden, chunken und in ChromaDB speichern.
 
+Inkrementell: Jeder Chunk bekommt eine stabile ID aus Quelldatei, Offset
+und Inhalts-Hash (siehe `chunk_id`). Ein Lauf bettet nur Chunks ein, deren
+ID noch fehlt, und löscht Chunks, deren ID nicht mehr vorkommt (geänderte
+oder entfernte Dateien). `python indexer.py --full` baut alles neu auf;
+bereits bekannte Texte kommen dabei aus dem Embedding-Cache.
+
+Neue Chunks werden in Batches von höchstens EMBEDDING_BATCH_TOKENS
+(geschätzten) Tokens gepackt und mit EMBEDDING_WORKERS Threads parallel
+eingebettet. Schlägt ein Batch fehl, wird nur dieser wiederholt; die
+Vektoren gehen gesammelt per upsert in die Collection.
+
+Der Lauf ist ein Strom: ein Leser-Thread chunkt Fall für Fall und legt
+fertige Batches in eine begrenzte Warteschlange (INDEX_QUEUE_SIZE), die
+Einbettung arbeitet sie ab und schreibt laufend. Im Speicher bleiben nur
+die Chunk-IDs für den Abgleich mit der Collection.
+"""
+
+import argparse
+import hashlib
 import json
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
 
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from config import (
     CHUNK_SIZE,
     CHUNK_OVERLAP,
-    EMBEDDING_MODEL,
     DATA_PATH,
     CHROMA_PATH,
     COLLECTION_NAME,
+    ID_PAGE_SIZE,
+    EMBEDDING_BATCH_TOKENS,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_WORKERS,
+    EMBEDDING_RETRIES,
+    CHROMA_WRITE_BATCH,
+    INDEX_QUEUE_SIZE,
+    EMBEDDING_MODEL,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
 )
+from embedding_cache import cached_openai_embeddings
 
 load_dotenv()
 
@@ -54,12 +88,255 @@ def get_all_case_dirs() -> list[Path]:
     return sorted(case_dirs)
 
 
-def index_all_cases() -> int:
-    """Alle Fälle in ChromaDB indexieren. Gibt die Anzahl indexierter Chunks zurück."""
+def chunk_id(source_path: str, chunk: Document) -> str:
+    """Stabile Chunk-ID: Quelldatei, Offset im Dokument und Inhalts-Hash.
+
+    Der Hash deckt Text und Metadaten ab; ändert sich eines davon (z.B. der
+    Status in der case_bible.json), entsteht eine neue ID und der alte
+    Chunk wird beim nächsten Lauf gelöscht.
+    """
+    digest = hashlib.sha256(chunk.page_content.encode("utf-8"))
+    digest.update(json.dumps(chunk.metadata, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return f"{source_path}:{chunk.metadata['start_index']}:{digest.hexdigest()[:16]}"
+
+
+def get_existing_ids(vectorstore: Chroma) -> set[str]:
+    """Alle Chunk-IDs in der Collection (seitenweise, ohne Embeddings)."""
+    ids: set[str] = set()
+    offset = 0
+    while True:
+        page = vectorstore._collection.get(include=[], limit=ID_PAGE_SIZE, offset=offset)
+        ids.update(page["ids"])
+        if len(page["ids"]) < ID_PAGE_SIZE:
+            return ids
+        offset += ID_PAGE_SIZE
+
+
+def clear_collection(vectorstore: Chroma) -> None:
+    """Alle Chunks seitenweise löschen; die Collection selbst bleibt bestehen.
+
+    Anders als `reset_collection()` behält sie so ihre ID, und offene
+    Verbindungen anderer Prozesse (Web-UI, Agent) bleiben gültig.
+    """
+    while ids := vectorstore._collection.get(include=[], limit=ID_PAGE_SIZE)["ids"]:
+        vectorstore.delete(ids=ids)
+
+
+def load_case_chunks(
+    case_dir: Path,
+    text_splitter: RecursiveCharacterTextSplitter,
+) -> list[tuple[str, Document]]:
+    """Alle Chunks eines Falls mit ihrer ID. Leer, wenn keine case_bible.json da ist."""
+    case_bible = load_case_bible(case_dir)
+    if not case_bible:
+        print(f"  Überspringe {case_dir.name}: keine case_bible.json")
+        return []
+
+    chunks = []
+    for doc_data, filename in load_documents(case_dir):
+        content = doc_data.get("content", "")
+        metadata = doc_data.get("metadata", {})
+
+        if not content:
+            continue
+
+        # Nur reiner Text als page_content — keine Metadaten im Chunk!
+        doc = Document(
+            page_content=content,
+            metadata={
+                "case_id": case_bible.get("case_id", ""),
+                "cluster": case_bible.get("cluster", ""),
+                "doc_typ": metadata.get("typ", ""),
+                "doc_datum": metadata.get("datum", ""),
+                "sprache": metadata.get("sprache", ""),
+                "schaden_chf": case_bible.get("betraege", {}).get("forderung_brutto", 0),
+                "status": case_bible.get("status", ""),
+                "source_file": filename,
+            },
+        )
+        source_path = f"{case_dir.name}/{filename}"
+        for split in text_splitter.split_documents([doc]):
+            chunks.append((chunk_id(source_path, split), split))
+    return chunks
+
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (ca. 3 Zeichen pro Token bei deutschem Text).
+
+    Bewusst ohne tiktoken: das bräuchte beim ersten Aufruf einen Download.
+    """
+    return len(text) // 3 + 1
+
+
+def iter_batches(
+    chunks: Iterable[tuple[str, Document]],
+    max_tokens: int = EMBEDDING_BATCH_TOKENS,
+    max_texts: int = EMBEDDING_BATCH_SIZE,
+) -> Iterator[list[tuple[str, Document]]]:
+    """Chunks laufend zu Batches mit Token- und Längenbudget packen."""
+    batch: list[tuple[str, Document]] = []
+    tokens = 0
+    for cid, split in chunks:
+        n = estimate_tokens(split.page_content)
+        if batch and (tokens + n > max_tokens or len(batch) >= max_texts):
+            yield batch
+            batch, tokens = [], 0
+        batch.append((cid, split))
+        tokens += n
+    if batch:
+        yield batch
+
+
+def prefetch(items: Iterable, maxsize: int = INDEX_QUEUE_SIZE) -> Iterator:
+    """`items` in einem eigenen Thread vorausholen, höchstens `maxsize` auf Vorrat.
+
+    So laufen Lesen/Chunken und Einbetten gleichzeitig, ohne dass der
+    Leser beliebig weit vorauseilt. Fehler des Lesers kommen beim
+    Verbraucher an.
+    """
+    q: queue.Queue = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in items:
+                while not stop.is_set():
+                    try:
+                        q.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            q.put((done, None))
+        except BaseException as e:
+            q.put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = q.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def write_vectors(
+    vectorstore: Chroma,
+    ids: list[str],
+    splits: list[Document],
+    vectors: list[list[float]],
+) -> None:
+    """Fertige Vektoren gesammelt in die Collection schreiben."""
+    for start in range(0, len(ids), CHROMA_WRITE_BATCH):
+        end = start + CHROMA_WRITE_BATCH
+        vectorstore._collection.upsert(
+            ids=ids[start:end],
+            embeddings=vectors[start:end],
+            documents=[s.page_content for s in splits[start:end]],
+            metadatas=[s.metadata for s in splits[start:end]],
+        )
+
+
+def embed_batch(
+    embeddings: Embeddings,
+    texts: list[str],
+    retries: int = EMBEDDING_RETRIES,
+) -> list[list[float]]:
+    """Einen Batch einbetten; bei Fehlern nur diesen Batch wiederholen."""
+    for attempt in range(retries + 1):
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = 2 ** (attempt + 1)
+            print(f"  Batch mit {len(texts)} Chunks fehlgeschlagen ({e}), neuer Versuch in {wait}s...")
+            time.sleep(wait)
+
+
+def embed_and_store(
+    vectorstore: Chroma,
+    embeddings: Embeddings,
+    chunks: Iterable[tuple[str, Document]],
+    workers: int = EMBEDDING_WORKERS,
+) -> tuple[int, int]:
+    """Chunks laufend batchweise parallel einbetten und in ChromaDB schreiben.
+
+    Es sind höchstens `workers` Batches gleichzeitig unterwegs und
+    INDEX_QUEUE_SIZE Batches vorgelesen; der Speicherbedarf hängt damit
+    nicht von der Grösse des Korpus ab.
+
+    Returns:
+        (eingebettete Chunks, endgültig fehlgeschlagene Chunks)
+    """
+    embedded = failed = 0
+    done: list[tuple[str, Document, list[float]]] = []
+    started = time.monotonic()
+
+    def flush() -> None:
+        nonlocal embedded
+        if not done:
+            return
+        ids, splits, vectors = map(list, zip(*done))
+        write_vectors(vectorstore, ids, splits, vectors)
+        embedded += len(done)
+        done.clear()
+        rate = embedded / max(time.monotonic() - started, 1e-9)
+        print(f"  {embedded} Chunks gespeichert ({rate:.0f}/s)")
+
+    def collect(future, batch) -> None:
+        nonlocal failed
+        try:
+            vectors = future.result()
+        except Exception as e:
+            print(f"  Batch mit {len(batch)} Chunks endgültig fehlgeschlagen: {e}")
+            failed += len(batch)
+            return
+        done.extend((cid, split, vector) for (cid, split), vector in zip(batch, vectors))
+        if len(done) >= CHROMA_WRITE_BATCH:
+            flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        for batch in prefetch(iter_batches(chunks)):
+            texts = [split.page_content for _, split in batch]
+            in_flight[pool.submit(embed_batch, embeddings, texts)] = batch
+            if len(in_flight) >= workers:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future, in_flight.pop(future))
+        for future in as_completed(in_flight):
+            collect(future, in_flight[future])
+    flush()
+    return embedded, failed
+
+
+def index_all_cases(full: bool = False) -> int:
+    """Alle Fälle inkrementell in ChromaDB indexieren.
+
+    Nur Chunks, deren ID noch nicht in der Collection ist, werden
+    eingebettet; Chunks geänderter oder gelöschter Dateien werden entfernt.
+    Mit `full=True` wird die Collection vorher geleert.
+
+    Die Fälle laufen als Strom durch: lesen, chunken, einbetten und
+    schreiben geschieht Fall für Fall, im Speicher liegen nur die IDs.
+
+    Returns:
+        Anzahl neu eingebetteter Chunks.
+    """
     print(f"Lade Dokumente aus: {DATA_PATH.resolve()}")
     print(f"Speichere Vektoren in: {CHROMA_PATH.resolve()}")
 
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
+    embeddings = cached_openai_embeddings(
+        EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+    )
 
     vectorstore = Chroma(
         collection_name=COLLECTION_NAME,
@@ -67,62 +344,56 @@ def index_all_cases() -> int:
         persist_directory=str(CHROMA_PATH),
     )
 
-    # Alte Daten löschen für sauberen Neustart
-    vectorstore.reset_collection()
+    if full:
+        # Alte Daten löschen für sauberen Neustart
+        clear_collection(vectorstore)
+        existing_ids: set[str] = set()
+    else:
+        existing_ids = get_existing_ids(vectorstore)
+        print(f"Bereits indexiert: {len(existing_ids)} Chunks")
 
-    all_documents = []
     case_dirs = get_all_case_dirs()
     print(f"Gefundene Fälle: {len(case_dirs)}")
 
-    for case_dir in case_dirs:
-        case_bible = load_case_bible(case_dir)
-        if not case_bible:
-            print(f"  Überspringe {case_dir.name}: keine case_bible.json")
-            continue
-
-        documents = load_documents(case_dir)
-        print(f"  Verarbeite {case_dir.name}: {len(documents)} Dokumente")
-
-        for doc_data, filename in documents:
-            content = doc_data.get("content", "")
-            metadata = doc_data.get("metadata", {})
-
-            if not content:
-                continue
-
-            # Nur reiner Text als page_content — keine Metadaten im Chunk!
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "case_id": case_bible.get("case_id", ""),
-                    "cluster": case_bible.get("cluster", ""),
-                    "doc_typ": metadata.get("typ", ""),
-                    "doc_datum": metadata.get("datum", ""),
-                    "sprache": metadata.get("sprache", ""),
-                    "schaden_chf": case_bible.get("betraege", {}).get("forderung_brutto", 0),
-                    "status": case_bible.get("status", ""),
-                    "source_file": filename,
-                },
-            )
-            all_documents.append(doc)
-
-    # RecursiveCharacterTextSplitter für intelligentes Chunking
+    # RecursiveCharacterTextSplitter für intelligentes Chunking;
+    # start_index (Offset im Dokument) geht in die Chunk-ID ein
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE,
         chunk_overlap=CHUNK_OVERLAP,
+        add_start_index=True,
     )
-    splits = text_splitter.split_documents(all_documents)
 
-    if splits:
-        print(f"\nIndexiere {len(splits)} Chunks...")
-        vectorstore.add_documents(splits)
-        print("Fertig!")
-    else:
-        print("Keine Dokumente zum Indexieren gefunden.")
+    current_ids: set[str] = set()
+
+    def new_chunks() -> Iterator[tuple[str, Document]]:
+        for n, case_dir in enumerate(case_dirs, 1):
+            chunks = load_case_chunks(case_dir, text_splitter)
+            new = [(cid, split) for cid, split in chunks if cid not in existing_ids and cid not in current_ids]
+            current_ids.update(cid for cid, _ in chunks)
+            if chunks:
+                print(f"  [{n}/{len(case_dirs)}] {case_dir.name}: {len(chunks)} Chunks, davon {len(new)} neu")
+            yield from new
+
+    embedded, failed = embed_and_store(vectorstore, embeddings, new_chunks())
+    if failed:
+        print(f"WARNUNG: {failed} Chunks nicht eingebettet, der nächste Lauf holt sie nach")
+
+    stale_ids = list(existing_ids - current_ids)
+    if stale_ids:
+        print(f"Entferne {len(stale_ids)} veraltete Chunks...")
+        for start in range(0, len(stale_ids), ID_PAGE_SIZE):
+            vectorstore.delete(ids=stale_ids[start:start + ID_PAGE_SIZE])
 
-    return len(splits)
+    unchanged = len(current_ids) - embedded - failed
+    print(f"Fertig! Neu: {embedded}, unverändert: {unchanged}, entfernt: {len(stale_ids)}")
+    cache = embeddings.stats()
+    print(f"Embedding-Cache: {cache['hits']} Treffer, {cache['misses']} API-Embeddings, {cache['entries']} Einträge")
+    return embedded
 
 
 if __name__ == "__main__":
-    count = index_all_cases()
-    print(f"\n{count} Chunks indexiert.")
+    parser = argparse.ArgumentParser(description="Fälle inkrementell in ChromaDB indexieren.")
+    parser.add_argument("--full", action="store_true", help="Collection leeren und alles neu einbetten")
+    args = parser.parse_args()
+    count = index_all_cases(full=args.full)
+    print(f"\n{count} Chunks neu indexiert.")
@@ -1,23 +1,88 @@
-"""Retriever: Ähnliche Chunks in ChromaDB suchen."""
+"""Retriever: Ähnliche Chunks in ChromaDB suchen.
 
+Embeddings-Client und Chroma-Verbindung werden pro Prozess einmal beim
+ersten Zugriff aufgebaut und danach von allen Anfragen (auch aus
+mehreren Threads) geteilt. Die Chunk-Anzahl der Collection wird für
+COLLECTION_STATS_TTL Sekunden zwischengespeichert.
+
+Ist die Collection verschwunden (von einem anderen Prozess gelöscht und
+neu angelegt), wird die Verbindung verworfen und die Abfrage einmal
+wiederholt.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from typing import TypeVar
+
+from chromadb.errors import NotFoundError
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from langchain_core.documents import Document
 
-from config import EMBEDDING_MODEL, CHROMA_PATH, COLLECTION_NAME, TOP_K
+from config import (
+    CHROMA_PATH,
+    COLLECTION_NAME,
+    COLLECTION_STATS_TTL,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    TOP_K,
+)
+from embedding_cache import cached_openai_embeddings
 
 load_dotenv()
 
+T = TypeVar("T")
+
+_vectorstore: Chroma | None = None
+_lock = threading.Lock()
+# (Zeitpunkt, Anzahl) der letzten Zählung
+_count_cache: tuple[float, int] | None = None
+
 
 def get_vectorstore() -> Chroma:
-    """ChromaDB-Verbindung herstellen."""
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-    return Chroma(
-        collection_name=COLLECTION_NAME,
-        embedding_function=embeddings,
-        persist_directory=str(CHROMA_PATH),
-    )
+    """Gemeinsame ChromaDB-Verbindung des Prozesses (beim ersten Aufruf erstellt)."""
+    global _vectorstore
+    if _vectorstore is None:
+        with _lock:
+            if _vectorstore is None:
+                _vectorstore = Chroma(
+                    collection_name=COLLECTION_NAME,
+                    embedding_function=cached_openai_embeddings(
+                        EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+                    ),
+                    persist_directory=str(CHROMA_PATH),
+                )
+    return _vectorstore
+
+
+def reset_vectorstore() -> None:
+    """Verbindung und gezählte Chunks verwerfen, z.B. nach einem Neuaufbau des Index."""
+    global _vectorstore, _count_cache
+    with _lock:
+        _vectorstore = None
+        _count_cache = None
+
+
+def _with_vectorstore(query: Callable[[Chroma], T]) -> T:
+    """`query` mit der gemeinsamen Verbindung ausführen, bei NotFoundError neu verbinden."""
+    try:
+        return query(get_vectorstore())
+    except NotFoundError:
+        reset_vectorstore()
+        return query(get_vectorstore())
+
+
+def get_chunk_count(max_age: float = COLLECTION_STATS_TTL) -> int:
+    """Anzahl Chunks in der Collection, höchstens `max_age` Sekunden alt."""
+    global _count_cache
+    cached = _count_cache
+    if cached is not None and time.monotonic() - cached[0] < max_age:
+        return cached[1]
+    count = _with_vectorstore(lambda vectorstore: vectorstore._collection.count())
+    _count_cache = (time.monotonic(), count)
+    return count
 
 
 def search(
@@ -35,19 +100,19 @@ def search(
     Returns:
         Liste von (Document, score) Tupeln
     """
-    vectorstore = get_vectorstore()
-    return vectorstore.similarity_search_with_score(
-        query,
-        k=k,
-        filter=filter_dict,
+    return _with_vectorstore(
+        lambda vectorstore: vectorstore.similarity_search_with_score(
+            query,
+            k=k,
+            filter=filter_dict,
+        )
     )
 
 
 def get_collection_stats() -> dict:
     """Statistiken über die indexierte Collection."""
-    vectorstore = get_vectorstore()
     try:
-        count = vectorstore._collection.count()
+        count = get_chunk_count()
         return {
             "total_chunks": count,
             "collection_name": COLLECTION_NAME,
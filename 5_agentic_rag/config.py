@@ -5,8 +5,12 @@ from pathlib import Path
 # Pfade
 BASE_DIR = Path(__file__).parent
 DATA_PATH = BASE_DIR / ".." / "2_syntetic_data" / "output"
-CHROMA_PATH = BASE_DIR / ".." / "4_rag" / "chroma_db"
+RAG_DIR = BASE_DIR / ".." / "4_rag"
+CHROMA_PATH = RAG_DIR / "chroma_db"
 SQLITE_PATH = BASE_DIR / "cases.db"
+# derselbe Cache (und dasselbe Modul embedding_cache.py) wie in 4_rag:
+# indexierte Chunks und Anfragen teilen sich die Vektoren
+EMBEDDING_CACHE_PATH = RAG_DIR / "embedding_cache.sqlite"
 
 # Modelle
 EMBEDDING_MODEL = "text-embedding-3-small"
@@ -17,3 +21,6 @@ TOP_K = 5
 
 # ChromaDB
 COLLECTION_NAME = "bauhaftpflicht_cases"
+
+# Embedding-Cache (ein 1536-dim. Vektor belegt ca. 6 KB)
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000
@@ -11,32 +11,57 @@ Architektur:
 
 import json
 import sqlite3
+import sys
+import threading
 
+from chromadb.errors import NotFoundError
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
 from agents import function_tool
 
 from config import (
-    EMBEDDING_MODEL,
     CHROMA_PATH,
     COLLECTION_NAME,
     DATA_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_MODEL,
+    RAG_DIR,
     SQLITE_PATH,
     TOP_K,
 )
 
+# embedding_cache.py gibt es nur in 4_rag (hinten anhängen: eigene Module gehen vor)
+sys.path.append(str(RAG_DIR))
+from embedding_cache import cached_openai_embeddings
+
 load_dotenv()
 
+_vectorstore: Chroma | None = None
+_vectorstore_lock = threading.Lock()
+
 
 def _get_vectorstore() -> Chroma:
-    """ChromaDB-Verbindung herstellen (interne Hilfsfunktion)."""
-    embeddings = OpenAIEmbeddings(model=EMBEDDING_MODEL)
-    return Chroma(
-        collection_name=COLLECTION_NAME,
-        embedding_function=embeddings,
-        persist_directory=str(CHROMA_PATH),
-    )
+    """Gemeinsame ChromaDB-Verbindung (interne Hilfsfunktion, einmal pro Prozess erstellt)."""
+    global _vectorstore
+    if _vectorstore is None:
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                _vectorstore = Chroma(
+                    collection_name=COLLECTION_NAME,
+                    embedding_function=cached_openai_embeddings(
+                        EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES
+                    ),
+                    persist_directory=str(CHROMA_PATH),
+                )
+    return _vectorstore
+
+
+def _reset_vectorstore() -> None:
+    """Verbindung verwerfen, z.B. nachdem 4_rag die Collection neu angelegt hat."""
+    global _vectorstore
+    with _vectorstore_lock:
+        _vectorstore = None
 
 
 # ---------------------------------------------------------------------------
@@ -56,12 +81,18 @@ def vector_search(query: str, k: int = TOP_K, case_id: str = "") -> str:
         k: Anzahl Ergebnisse (Standard: 5).
         case_id: Optional — nur in diesem Fall suchen, z.B. "W1".
     """
-    vectorstore = _get_vectorstore()
     filter_dict = {"case_id": case_id} if case_id else None
 
-    results = vectorstore.similarity_search_with_score(
-        query, k=k, filter=filter_dict
-    )
+    try:
+        results = _get_vectorstore().similarity_search_with_score(
+            query, k=k, filter=filter_dict
+        )
+    except NotFoundError:
+        # Collection wurde inzwischen gelöscht und neu angelegt: neu verbinden
+        _reset_vectorstore()
+        results = _get_vectorstore().similarity_search_with_score(
+            query, k=k, filter=filter_dict
+        )
 
     if not results:
         return "Keine relevanten Dokumente gefunden."